@@ -0,0 +1,30 @@
+"""Add shift cafe start index
+
+Revision ID: 3f1c9a7d2e4b
+Revises: bae69e1e3244
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2e4b'
+down_revision: Union[str, Sequence[str], None] = 'bae69e1e3244'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_shift_cafe_start', 'shifts', ['cafe_id', 'start_time'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_shift_cafe_start', table_name='shifts')
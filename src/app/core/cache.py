@@ -0,0 +1,37 @@
+"""Простой in-memory кэш с ограниченным временем жизни записей."""
+
+import time
+from collections.abc import Hashable
+from typing import Any
+
+
+class TTLCache:
+    """Словарь, записи которого устаревают через ttl секунд."""
+
+    def __init__(self, ttl: float) -> None:
+        """Инициализация кэша с временем жизни записей ttl (в секундах)."""
+        self.ttl = ttl
+        self._data: dict[Hashable, tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Вернуть значение по ключу или default, если запись устарела."""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохранить значение по ключу."""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Hashable) -> None:
+        """Удалить запись по ключу, если она есть."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Очистить кэш."""
+        self._data.clear()
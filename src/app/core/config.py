@@ -15,6 +15,12 @@ class Settings(BaseSettings):
     postgres_port: str = '5433'
     redis_pass: str = 'mystrongpassword'
 
+    # Пул соединений с БД
+    db_pool_size: int = 20
+    db_max_overflow: int = 40
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 3600
+
     bot_token: str
 
     secret: str = 'SECRET'
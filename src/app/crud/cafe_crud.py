@@ -1,11 +1,13 @@
 """CRUD операции для модели Cafe."""
 
+from datetime import time
 from typing import List, Optional
 
-from sqlalchemy import select
+from sqlalchemy import exists, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.cache import TTLCache
 from app.crud.base_crud import CRUDBase
 from app.exceptions import CafeNotFoundError
 from app.models.cafe import Cafe
@@ -13,6 +15,18 @@ from app.models.user import User
 from app.schemas.cafe_schema import CafeCreate, CafeUpdate
 from app.services.cafe_service import cafe_service
 
+# Кэши живут в памяти процесса: запись сбрасывает их только в том
+# процессе, где она выполнена. Изменения, сделанные через API, бот
+# увидит не позже чем через ttl соответствующего кэша.
+# Адреса кафе для клавиатур бота: [(id, address)]
+_address_cache = TTLCache(ttl=60)
+# Кафе для списка редактирования в боте: [(id, name, city, address)]
+_summary_cache = TTLCache(ttl=15)
+# Часы работы кафе для проверки смен: {cafe_id: (open_time, close_time)}
+_hours_cache = TTLCache(ttl=60)
+# Город кафе для поиска смен баристы: {cafe_id: city}
+_city_cache = TTLCache(ttl=60)
+
 
 class CRUDCafe(CRUDBase[Cafe, CafeCreate, CafeUpdate]):
     """CRUD операции для кафе."""
@@ -41,6 +55,10 @@ class CRUDCafe(CRUDBase[Cafe, CafeCreate, CafeUpdate]):
         session.add(db_obj)
         await session.commit()
         await session.refresh(db_obj)
+        _address_cache.clear()
+        _summary_cache.clear()
+        _hours_cache.pop(db_obj.id)
+        _city_cache.pop(db_obj.id)
         return db_obj
 
     async def create(
@@ -63,6 +81,22 @@ class CRUDCafe(CRUDBase[Cafe, CafeCreate, CafeUpdate]):
         session.add(db_obj)
         await session.commit()
         await session.refresh(db_obj)
+        _address_cache.clear()
+        _summary_cache.clear()
+        return db_obj
+
+    async def remove(
+        self,
+        db_obj: Cafe,
+        session: AsyncSession,
+    ) -> Cafe:
+        """Удалить кафе и сбросить кэши адресов и часов работы."""
+        cafe_id = db_obj.id
+        db_obj = await super().remove(db_obj, session)
+        _address_cache.clear()
+        _summary_cache.clear()
+        _hours_cache.pop(cafe_id)
+        _city_cache.pop(cafe_id)
         return db_obj
 
     async def get_with_manager(
@@ -87,6 +121,139 @@ class CRUDCafe(CRUDBase[Cafe, CafeCreate, CafeUpdate]):
         )
         return result.scalars().first()
 
+    async def get_addresses_cached(
+        self,
+        session: AsyncSession,
+        limit: int = 100,
+    ) -> list[tuple[int, str]]:
+        """Получить пары (id, адрес) кафе с кэшированием.
+
+        Args:
+            session: Асинхронная сессия базы данных.
+            limit: Максимальное количество возвращаемых записей.
+
+        Returns:
+            Список пар (id, адрес); кэш сбрасывается при изменении кафе.
+
+        """
+        addresses = _address_cache.get(limit)
+        if addresses is None:
+            result = await session.execute(
+                select(self.model.id, self.model.address).limit(limit),
+            )
+            addresses = [tuple(row) for row in result.all()]
+            _address_cache.set(limit, addresses)
+        return addresses
+
+    async def get_summaries_cached(
+        self,
+        session: AsyncSession,
+        limit: int = 100,
+    ) -> list[tuple[int, str, str, str]]:
+        """Получить кортежи (id, название, город, адрес) с кэшированием.
+
+        Args:
+            session: Асинхронная сессия базы данных.
+            limit: Максимальное количество возвращаемых записей.
+
+        Returns:
+            Список кортежей; кэш сбрасывается при изменении кафе.
+
+        """
+        summaries = _summary_cache.get(limit)
+        if summaries is None:
+            result = await session.execute(
+                select(
+                    self.model.id,
+                    self.model.name,
+                    self.model.city,
+                    self.model.address,
+                ).limit(limit),
+            )
+            summaries = [tuple(row) for row in result.all()]
+            _summary_cache.set(limit, summaries)
+        return summaries
+
+    async def exists(
+        self,
+        cafe_id: int,
+        session: AsyncSession,
+    ) -> bool:
+        """Проверить, существует ли кафе, не загружая его строку.
+
+        Args:
+            cafe_id: ID кафе.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            True, если кафе с таким ID есть.
+
+        """
+        result = await session.execute(
+            select(exists().where(self.model.id == cafe_id)),
+        )
+        return result.scalar()
+
+    async def get_hours_cached(
+        self,
+        cafe_id: int,
+        session: AsyncSession,
+    ) -> tuple[time, time]:
+        """Получить часы работы кафе с кэшированием.
+
+        Кэш не общий для процессов бота и API: после правки часов через
+        API бот до 60 секунд может проверять смены по старым значениям.
+
+        Args:
+            cafe_id: ID кафе.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Пара (open_time, close_time).
+
+        Raises:
+            CafeNotFoundError: Если кафе не найдено.
+
+        """
+        hours = _hours_cache.get(cafe_id)
+        if hours is None:
+            result = await session.execute(
+                select(self.model.open_time, self.model.close_time).where(
+                    self.model.id == cafe_id,
+                ),
+            )
+            row = result.first()
+            if row is None:
+                raise CafeNotFoundError(cafe_id)
+            hours = tuple(row)
+            _hours_cache.set(cafe_id, hours)
+        return hours
+
+    async def get_city_cached(
+        self,
+        cafe_id: int,
+        session: AsyncSession,
+    ) -> str | None:
+        """Получить город кафе с кэшированием.
+
+        Args:
+            cafe_id: ID кафе.
+            session: Асинхронная сессия базы данных.
+
+        Returns:
+            Город кафе или None, если кафе не найдено.
+
+        """
+        city = _city_cache.get(cafe_id)
+        if city is None:
+            result = await session.execute(
+                select(self.model.city).where(self.model.id == cafe_id),
+            )
+            city = result.scalar_one_or_none()
+            if city is not None:
+                _city_cache.set(cafe_id, city)
+        return city
+
     async def get_multi_with_manager(
         self,
         session: AsyncSession,
@@ -1,8 +1,9 @@
+from collections.abc import Iterable
 from datetime import date, datetime, timedelta
-from typing import List, Optional
+from typing import Any, List, Optional
 
 from fastapi.encoders import jsonable_encoder
-from sqlalchemy import Date, cast, select
+from sqlalchemy import Date, cast, delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from sqlalchemy.sql.expression import asc
@@ -11,6 +12,7 @@ from app.crud.base_crud import CRUDBase
 from app.models.cafe import Cafe
 from app.models.reservation import Reservation, Status
 from app.models.shift import Shift
+from app.models.user import User
 from app.schemas.reservation_schema import ReservationCreate, ReservationUpdate
 
 
@@ -41,6 +43,52 @@ class CRUDReservation(
         )
         return db_objs.scalars().all()
 
+    async def remove_and_return_barista(
+        self,
+        reservation_id: int,
+        session: AsyncSession,
+    ) -> Optional[User]:
+        """Удалить бронь и вернуть её бариста одним запросом.
+
+        Возвращает None, если брони с таким ID нет.
+        """
+        deleted = (
+            delete(Reservation)
+            .where(Reservation.id == reservation_id)
+            .returning(Reservation.barista_id)
+            .cte('deleted')
+        )
+        result = await session.execute(
+            select(User).join(deleted, User.id == deleted.c.barista_id)
+        )
+        barista = result.scalars().first()
+        await session.commit()
+        return barista
+
+    async def count_by_status_for_shifts(
+        self,
+        shift_ids: Iterable[int],
+        session: AsyncSession,
+    ) -> dict[int, dict[str, int]]:
+        """Посчитать брони смен по статусам одним GROUP BY.
+
+        Возвращает {shift_id: {имя статуса: количество}}; смены без
+        броней в результат не попадают.
+        """
+        result = await session.execute(
+            select(
+                Reservation.shift_id,
+                Reservation.status,
+                func.count(),
+            )
+            .where(Reservation.shift_id.in_(shift_ids))
+            .group_by(Reservation.shift_id, Reservation.status)
+        )
+        counts: dict[int, dict[str, int]] = {}
+        for shift_id, status, count in result:
+            counts.setdefault(shift_id, {})[status.name] = count
+        return counts
+
     async def update_status(
         self,
         reservation_id: int,
@@ -56,6 +104,24 @@ class CRUDReservation(
             await session.refresh(db_obj)
         return db_obj
 
+    async def update_bulk_fields(
+        self,
+        reservation_id: int,
+        values: dict[str, Any],
+        session: AsyncSession,
+    ) -> int:
+        """Обновить поля брони одним UPDATE без загрузки объекта.
+
+        Возвращает количество обновленных строк.
+        """
+        result = await session.execute(
+            update(Reservation)
+            .where(Reservation.id == reservation_id)
+            .values(**values)
+        )
+        await session.commit()
+        return result.rowcount
+
     async def cancel(
         self,
         reservation_id: int,
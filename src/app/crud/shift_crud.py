@@ -27,6 +27,7 @@ class ShiftCRUD(CRUDBase[Shift, ShiftCreate, ShiftUpdate]):
         Если указан cafe_id — фильтрует по кафе;
         Если указаны start_time и/или end_time — выбирает смены,
         полностью попадающие в диапазон.
+        Смены упорядочены по времени начала.
         """
         query = select(self.model).options(selectinload(self.model.cafe))
 
@@ -36,6 +37,7 @@ class ShiftCRUD(CRUDBase[Shift, ShiftCreate, ShiftUpdate]):
             query = query.where(self.model.start_time >= start_time)
         if end_time is not None:
             query = query.where(self.model.end_time <= end_time)
+        query = query.order_by(self.model.start_time)
 
         result = await session.execute(query)
         return result.scalars().all()
@@ -68,6 +70,30 @@ class ShiftCRUD(CRUDBase[Shift, ShiftCreate, ShiftUpdate]):
         result = await session.execute(query)
         return result.scalars().all()
 
+    async def find_overlapping(
+        self,
+        cafe_id: int,
+        start_time: datetime,
+        end_time: datetime,
+        session: AsyncSession,
+    ) -> Shift | None:
+        """Найти первую смену кафе, пересекающуюся с интервалом.
+
+        В отличие от get_shift_at_the_same_time, смены, лишь касающиеся
+        границ интервала, пересечением не считаются.
+        """
+        result = await session.execute(
+            select(self.model)
+            .where(
+                self.model.cafe_id == cafe_id,
+                self.model.start_time < end_time,
+                self.model.end_time > start_time,
+            )
+            .order_by(self.model.start_time)
+            .limit(1)
+        )
+        return result.scalars().first()
+
     async def get_or_404(
         self,
         shift_id: int,
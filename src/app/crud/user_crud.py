@@ -1,4 +1,4 @@
-from collections.abc import Sequence
+from collections.abc import Iterable, Sequence
 from datetime import datetime, timedelta
 from typing import List, Optional
 
@@ -7,6 +7,7 @@ from sqlalchemy import String, cast, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 # from app.services.user_service import hash_password
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.core.constants import (
     ACCESS_TOKEN_EXPIRE_MINUTES,
@@ -19,10 +20,18 @@ from app.crud.base_crud import CRUDBase
 from app.exceptions.common_exceptions import NotFoundError, ValidationError
 from app.models.user import Role, User
 from app.schemas.user_schema import (
+    UserCreate,
     UserRead,
     UserResponse,
+    UserUpdate,
 )
 
+# Списки пользователей по ролям для клавиатур бота:
+# {role: [(id, name, telegram_id)]}
+_role_cache = TTLCache(ttl=60)
+# Кафе пользователей для диалогов бота: {telegram_id: cafe_id}
+_cafe_id_cache = TTLCache(ttl=300)
+
 
 class CRUDUser(CRUDBase):
     """CRUD-операции для модели User."""
@@ -42,6 +51,35 @@ class CRUDUser(CRUDBase):
         )
         return result.scalar_one_or_none()
 
+    async def get_cafe_id_cached(
+        self,
+        telegram_id: int,
+        session: AsyncSession,
+    ) -> int | None:
+        """Получение ID кафе пользователя по Telegram ID с кэшированием."""
+        cafe_id = _cafe_id_cache.get(telegram_id)
+        if cafe_id is None:
+            result = await session.execute(
+                select(User.cafe_id).where(User.telegram_id == telegram_id)
+            )
+            cafe_id = result.scalar_one_or_none()
+            # Пользователи без кафе не кэшируются, чтобы назначение
+            # кафе было видно сразу
+            if cafe_id is not None:
+                _cafe_id_cache.set(telegram_id, cafe_id)
+        return cafe_id
+
+    async def get_by_ids(
+        self,
+        ids: Iterable[int],
+        session: AsyncSession,
+    ) -> dict[int, User]:
+        """Получение пользователей по списку ID одним запросом."""
+        result = await session.execute(
+            select(User).where(User.id.in_(set(ids)))
+        )
+        return {user.id: user for user in result.scalars()}
+
     async def get_or_404(self, user_id: int, session: AsyncSession) -> User:
         """Получение пользователя по ID или ошибка 404."""
         user = await self.get(user_id, session)
@@ -121,6 +159,56 @@ class CRUDUser(CRUDBase):
         user = await session.execute(select(User).where(User.role == role))
         return user.scalars().all()
 
+    async def get_multi_by_role_cached(
+        self,
+        role: Role,
+        session: AsyncSession,
+    ) -> list[tuple[int, str, int]]:
+        """Получить (id, имя, telegram_id) пользователей роли с кэшем."""
+        users = _role_cache.get(role)
+        if users is None:
+            users = [
+                (user.id, user.name, user.telegram_id)
+                for user in await self.get_multi_by_role(role, session)
+            ]
+            _role_cache.set(role, users)
+        return users
+
+    async def create(
+        self,
+        obj_in: UserCreate,
+        session: AsyncSession,
+        user: Optional[User] = None,
+    ) -> User:
+        """Создать пользователя и сбросить кэш списков по ролям."""
+        db_obj = await super().create(obj_in, session, user)
+        _role_cache.clear()
+        return db_obj
+
+    async def update(
+        self,
+        db_obj: User,
+        obj_in: UserUpdate,
+        session: AsyncSession,
+    ) -> User:
+        """Обновить пользователя и сбросить кэши ролей и кафе."""
+        db_obj = await super().update(db_obj, obj_in, session)
+        _role_cache.clear()
+        _cafe_id_cache.pop(db_obj.telegram_id)
+        return db_obj
+
+    async def remove(
+        self,
+        db_obj: User,
+        session: AsyncSession,
+    ) -> User:
+        """Удалить пользователя и сбросить кэши ролей и кафе."""
+        telegram_id = db_obj.telegram_id
+        db_obj = await super().remove(db_obj, session)
+        _role_cache.clear()
+        _cafe_id_cache.pop(telegram_id)
+        return db_obj
+
     async def search_by_query(
             self,
             query: str,
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, List
 
-from sqlalchemy import DateTime, ForeignKey, Integer
+from sqlalchemy import DateTime, ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
@@ -15,6 +15,9 @@ class Shift(Base):
     """Модель смены бариста."""
 
     __tablename__ = 'shifts'
+    __table_args__ = (
+        Index('ix_shift_cafe_start', 'cafe_id', 'start_time'),
+    )
 
     start_time: Mapped[datetime] = mapped_column(
         DateTime(timezone=False), nullable=False
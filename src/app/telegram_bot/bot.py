@@ -1,4 +1,4 @@
-from telegram.ext import Application
+from telegram.ext import AIORateLimiter, Application
 
 from app.core.config import settings
 from app.telegram_bot.handlers.admin import AdminHandler
@@ -11,7 +11,13 @@ def setup_handlers(application: Application) -> None:
 
 def main() -> None:
     """Запуск бота."""
-    application = Application.builder().token(settings.bot_token).build()
+    # Ограничитель частоты запросов к Bot API на уровне приложения
+    application = (
+        Application.builder()
+        .token(settings.bot_token)
+        .rate_limiter(AIORateLimiter())
+        .build()
+    )
 
     setup_handlers(application)
     application.run_polling()
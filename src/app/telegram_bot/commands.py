@@ -35,9 +35,15 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 
 async def show_start_menu(
-    update: Update, context: ContextTypes.DEFAULT_TYPE
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE,
+    prefix_text: str | None = None,
 ) -> int:
-    """Показывает стартовое меню в зависимости от роли пользователя."""
+    """Показывает стартовое меню в зависимости от роли пользователя.
+
+    Если передан prefix_text, он выводится перед приветствием, а при
+    нажатии кнопки меню заменяет текущее сообщение одним запросом.
+    """
     role_mapping = {
         'admin': 'Администратор',
         'manager': 'Управляющий',
@@ -153,9 +159,16 @@ async def show_start_menu(
 
         text = f'Добро пожаловать, {role_mapping[user.role]}!'
 
+    if prefix_text:
+        text = f'{prefix_text}\n\n{text}'
+
     # Проверяем тип обновления
     if update.message:
         await update.message.reply_text(text, reply_markup=keyboard)
+    elif update.callback_query and prefix_text:
+        await update.callback_query.edit_message_text(
+            text, reply_markup=keyboard
+        )
     elif update.callback_query:
         await update.callback_query.message.reply_text(
             text,
@@ -4,9 +4,9 @@ import logging
 from datetime import datetime, timedelta
 from typing import List, Optional, Tuple
 
-from sqlalchemy import select
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import contains_eager, selectinload
 from telegram import (
     InlineKeyboardButton,
     InlineKeyboardMarkup,
@@ -29,13 +29,30 @@ from app.crud.user_crud import crud_user
 from app.models.cafe import Cafe
 from app.models.reservation import Reservation, Status
 from app.models.shift import Shift
+from app.models.user import User
 from app.telegram_bot.commands import cancel, show_start_menu
 
 logger = logging.getLogger(__name__)
 
+_REMOVE_KB = ReplyKeyboardRemove()
+
 # Состояния для работы со слотами
 SELECT_SHIFT, CONFIRM_SHIFT = range(2)
 
+_MIN_SECONDS_BETWEEN_SHIFTS = MIN_HOURS_BETWEEN_SHIFTS * 3600
+
+# Статусы броней, занимающих место на смене
+_ACTIVE_STATUSES = (Status.RESERVED, Status.ATTENDED)
+
+
+# Клавиатура подтверждения не зависит от смены — создаём её один раз
+_CONFIRM_CANCEL_KB = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("✅ Подтвердить", callback_data="confirm_shift"),
+        InlineKeyboardButton("❌ Отменить", callback_data="cancel"),
+    ]
+])
+
 
 class BaristaSlotsHandler:
     """Обработчик работы со слотами для баристы."""
@@ -56,61 +73,66 @@ class BaristaSlotsHandler:
 
             user_id = update.effective_user.id
             async with async_session_maker() as session:
-                user = await crud_user.get_by_telegram_id(user_id, session)
-                if not user or not user.cafe_id:
+                # Кафе и его город берутся из кэшей CRUD, которые
+                # сбрасываются при изменении пользователя и кафе
+                cafe_id = await crud_user.get_cafe_id_cached(user_id, session)
+                if not cafe_id:
                     await msg_target.reply_text(
-                        "Вы не привязаны к кафе. Обратитесь к администратору.",
-                        reply_markup=ReplyKeyboardRemove()
+                        "Вы не привязаны к кафе. "
+                        "Обратитесь к администратору.",
+                        reply_markup=_REMOVE_KB
                     )
                     return await show_start_menu(update, context)
 
-                cafe = await cafe_crud.get(user.cafe_id, session)
-                if not cafe:
+                city = await cafe_crud.get_city_cached(cafe_id, session)
+                if city is None:
                     await msg_target.reply_text(
-                        "Ваше кафе не найдено. Обратитесь к администратору.",
-                        reply_markup=ReplyKeyboardRemove()
+                        "Ваше кафе не найдено. "
+                        "Обратитесь к администратору.",
+                        reply_markup=_REMOVE_KB
                     )
                     return await show_start_menu(update, context)
 
                 shifts = await self._get_available_shifts(
-                    user_id, cafe.city, session)
+                    user_id, city, session)
 
                 if not shifts:
                     await msg_target.reply_text(
                         "На текущую и следующую неделю нет "
                         "доступных смен в вашем городе.",
-                        reply_markup=ReplyKeyboardRemove()
+                        reply_markup=_REMOVE_KB
                     )
                     return await show_start_menu(update, context)
 
                 shifts_by_date = self._group_shifts_by_date(shifts)
-                message_text = "📅 Доступные смены для бронирования:\n\n"
-                buttons = []
+                lines: List[str] = []
+                buttons: List[List[InlineKeyboardButton]] = []
 
                 for date, date_shifts in shifts_by_date.items():
-                    message_text += f"<b>{date.strftime('%d.%m.%Y')}</b>:\n"
+                    lines.append(f"<b>{date:%d.%m.%Y}</b>:\n")
                     for shift in date_shifts:
                         cafe_name = shift.cafe.name if shift.cafe else "кафе"
-                        message_text += (
-                            f"🕒 {shift.start_time.strftime('%H:%M')}-"
-                            f"{shift.end_time.strftime('%H:%M')} "
-                            f"📍 {cafe_name}\n"
-                            f"   👥 Свободных мест: "
-                            f"{shift.barista_count - len(shift.reservations)}"
+                        time_range = (
+                            f"{shift.start_time:%H:%M}-{shift.end_time:%H:%M}"
+                        )
+                        free_slots = (
+                            shift.barista_count - len(shift.reservations)
                         )
-                        button_text = (
-                            f"{date.strftime('%d.%m')} "
-                            f"{shift.start_time.strftime('%H:%M')}-"
-                            f"{shift.end_time.strftime('%H:%M')} "
-                            f"{cafe_name}"
+                        lines.append(
+                            f"🕒 {time_range} 📍 {cafe_name}\n"
+                            f"   👥 Свободных мест: {free_slots}\n"
                         )
                         buttons.append([
                             InlineKeyboardButton(
-                                button_text,
+                                f"{date:%d.%m} {time_range} {cafe_name}",
                                 callback_data=f"select_shift_{shift.id}",
                             )
                         ])
 
+                message_text = (
+                    "📅 Доступные смены для бронирования:\n\n"
+                    + "".join(lines)
+                )
                 keyboard = InlineKeyboardMarkup(buttons)
                 await msg_target.reply_text(
                     message_text,
@@ -131,46 +153,44 @@ class BaristaSlotsHandler:
     ) -> List[Shift]:
         """Возвращает список доступных смен для баристы."""
         try:
+            # Время смен вводится администраторами как локальное и хранится
+            # без таймзоны, поэтому сравниваем с локальным временем, как и
+            # остальные обработчики бота.
             now = datetime.now()
             next_week = now + timedelta(days=14)
 
+            barista_id = (
+                select(User.id)
+                .where(User.telegram_id == user_id)
+                .scalar_subquery()
+            )
+            # Смены, уже забронированные самим баристой, отсекаются в SQL
+            booked_by_user = Shift.reservations.any(and_(
+                Reservation.barista_id == barista_id,
+                Reservation.status.in_(_ACTIVE_STATUSES),
+            ))
             stmt = (
                 select(Shift)
                 .join(Shift.cafe)
                 .where(Cafe.city == city)
                 .where(Shift.start_time >= now)
                 .where(Shift.start_time <= next_week)
+                .where(~booked_by_user)
                 .options(
                     selectinload(Shift.reservations),
-                    selectinload(Shift.cafe)
+                    # Кафе уже присоединено для фильтра по городу
+                    contains_eager(Shift.cafe),
                 )
                 .order_by(Shift.start_time)
             )
 
             shifts = (await session.execute(stmt)).scalars().all()
 
-            user = await crud_user.get_by_telegram_id(user_id, session)
-            if not user:
-                return []
-
-            reservations_stmt = (
-                select(Reservation)
-                .where(Reservation.barista_id == user.id)
-                .where(Reservation.status.in_(
-                    [Status.RESERVED, Status.ATTENDED])
-                ))
-            reservations = (await session.execute(
-                reservations_stmt)).scalars().all()
-            booked_shift_ids = {r.shift_id for r in reservations}
-
             available_shifts = []
             for shift in shifts:
-                if shift.id in booked_shift_ids:
-                    continue
-
                 reserved_count = sum(
                     1 for r in shift.reservations
-                    if r.status in [Status.RESERVED, Status.ATTENDED]
+                    if r.status in _ACTIVE_STATUSES
                 )
                 if reserved_count < shift.barista_count:
                     available_shifts.append(shift)
@@ -217,26 +237,27 @@ class BaristaSlotsHandler:
                 other_end = other_shift.end_time
 
                 logger.debug(
-                    f"Checking shift {shift.id} ({shift_start}-{shift_end})"
+                    "Checking shift %s (%s-%s)",
+                    shift.id, shift_start, shift_end,
                 )
                 logger.debug(
-                    f"Against shift {other_shift.id} "
-                    f"({other_start}-{other_end})"
+                    "Against shift %s (%s-%s)",
+                    other_shift.id, other_start, other_end,
                 )
 
                 if (shift_start < other_end) and (shift_end > other_start):
                     logger.debug("Found time overlap conflict")
                     return (other_shift, "overlap", "пересекающаяся")
 
-                time_between_shifts = min(
-                    abs((shift_start - other_end).total_seconds()),
-                    abs((other_start - shift_end).total_seconds())
-                )
-                logger.debug(
-                    f"Time between shifts: {time_between_shifts/3600} hours"
-                )
+                # Смены не пересекаются, поэтому положителен ровно один
+                # из двух промежутков — его и считаем.
+                if shift_start >= other_end:
+                    gap = (shift_start - other_end).total_seconds()
+                else:
+                    gap = (other_start - shift_end).total_seconds()
+                logger.debug("Time between shifts: %s hours", gap / 3600)
 
-                if time_between_shifts < MIN_HOURS_BETWEEN_SHIFTS * 3600:
+                if gap < _MIN_SECONDS_BETWEEN_SHIFTS:
                     if shift_start > other_end:
                         logger.debug("Found minimum time conflict (before)")
                         return (other_shift, "before", "предыдущая")
@@ -265,8 +286,7 @@ class BaristaSlotsHandler:
                     .where(Shift.id == shift_id)
                     .options(
                         selectinload(Shift.cafe),
-                        selectinload(Shift.reservations).selectinload(
-                            Reservation.shift)
+                        selectinload(Shift.reservations),
                     )
                 )
                 result = await session.execute(stmt)
@@ -319,7 +339,7 @@ class BaristaSlotsHandler:
 
                 reserved_count = sum(
                     1 for r in shift.reservations
-                    if r.status in [Status.RESERVED, Status.ATTENDED]
+                    if r.status in _ACTIVE_STATUSES
                 )
                 free_slots = shift.barista_count - reserved_count
 
@@ -336,18 +356,9 @@ class BaristaSlotsHandler:
                     "Подтвердите бронирование:"
                 )
 
-                keyboard = InlineKeyboardMarkup([
-                    [
-                        InlineKeyboardButton(
-                            "✅ Подтвердить", callback_data="confirm_shift"),
-                        InlineKeyboardButton(
-                            "❌ Отменить", callback_data="cancel"),
-                    ]
-                ])
-
                 await query.edit_message_text(
                     message,
-                    reply_markup=keyboard,
+                    reply_markup=_CONFIRM_CANCEL_KB,
                     parse_mode="HTML",
                 )
 
@@ -378,7 +389,7 @@ class BaristaSlotsHandler:
                 if not user:
                     await query.edit_message_text(
                         "Пользователь не найден.",
-                        reply_markup=ReplyKeyboardRemove()
+                        reply_markup=_REMOVE_KB
                     )
                     return await show_start_menu(update, context)
 
@@ -398,7 +409,7 @@ class BaristaSlotsHandler:
 
                 reserved_count = sum(
                     1 for r in shift.reservations
-                    if r.status in [Status.RESERVED, Status.ATTENDED]
+                    if r.status in _ACTIVE_STATUSES
                 )
                 if reserved_count >= shift.barista_count:
                     await query.edit_message_text(
@@ -450,7 +461,7 @@ class BaristaSlotsHandler:
             await query.edit_message_text(
                 "Произошла ошибка при бронировании. "
                 "Пожалуйста, попробуйте позже.",
-                reply_markup=ReplyKeyboardRemove()
+                reply_markup=_REMOVE_KB
             )
             return await show_start_menu(update, context)
 
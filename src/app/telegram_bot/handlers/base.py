@@ -11,6 +11,8 @@ from app.core.db import get_async_session
 
 logger = logging.getLogger(__name__)
 
+_REMOVE_KB = ReplyKeyboardRemove()
+
 
 class BaseHandler:
     """Базовый класс для всех обработчиков."""
@@ -20,7 +22,7 @@ class BaseHandler:
     ) -> int:
         """Отмена текущего действия."""
         await update.message.reply_text(
-            'Действие отменено.', reply_markup=ReplyKeyboardRemove()
+            'Действие отменено.', reply_markup=_REMOVE_KB
         )
         return ConversationHandler.END
 
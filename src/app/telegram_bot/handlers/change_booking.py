@@ -1,5 +1,9 @@
+import asyncio
 import logging
-from datetime import date, datetime
+import re
+from datetime import date, datetime, time, timedelta
+from functools import partial
+from types import MappingProxyType
 
 from sqlalchemy.ext.asyncio import AsyncSession
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
@@ -17,24 +21,80 @@ from app.crud.shift_crud import shift_crud
 from app.crud.user_crud import crud_user
 from app.models.reservation import Status as ReservationStatus
 from app.models.shift import Shift
-from app.schemas.reservation_schema import ReservationUpdate
 from app.tasks.activity_manager import activity_manager
 from app.telegram_bot.commands import show_start_menu
 
 # Состояния для изменения бронирования
 SELECT_DATE, SELECT_SHIFT, CHANGE_BOOKING, SELECT_BARISTA = range(4)
 
+# Префиксы callback_data
+CB_DATE_PREFIX = 'select_date_'
+CB_SHIFT_PREFIX = 'select_shift_'
+CB_REMOVE_PREFIX = 'remove_booking_'
+CB_CHANGE_PREFIX = 'change_barista_'
+CB_BARISTA_PREFIX = 'select_barista_'
+
+# Скомпилированные шаблоны callback_data для обработчиков диалога
+_PAT_START = re.compile(r'^change_booking$')
+_PAT_CANCEL = re.compile(r'^cancel_change_booking$')
+_PAT_SELECT_DATE = re.compile(f'^{CB_DATE_PREFIX}')
+_PAT_SELECT_SHIFT = re.compile(f'^{CB_SHIFT_PREFIX}')
+_PAT_CHANGE_BOOKING = re.compile(
+    f'^({CB_REMOVE_PREFIX}|{CB_CHANGE_PREFIX}|assign_barista|back_to_shifts)'
+)
+_PAT_SELECT_BARISTA = re.compile(rf'^{CB_BARISTA_PREFIX}\d+_\d+_\d+$')
+_PAT_BACK_TO_SHIFT = re.compile(r'^back_to_shift$')
+
+# Порядок и подписи статусов в статистике смены
+_STATUS_ORDER = ('RESERVED', 'ONCONFIRM', 'ATTENDED', 'CANCELLED')
+_STATUS_LABELS = MappingProxyType({
+    'RESERVED': 'забронировано',
+    'ONCONFIRM': 'на подтверждении',
+    'ATTENDED': 'присутствовал',
+    'CANCELLED': 'отменено',
+})
+
+# Неизменяемые ряды кнопок, общие для всех клавиатур модуля
+_CANCEL_ROW = (
+    InlineKeyboardButton('❌ Отменить', callback_data='cancel_change_booking'),
+)
+_BACK_TO_SHIFT_ROW = (
+    InlineKeyboardButton('↩️ Назад', callback_data='back_to_shift'),
+)
+_BACK_TO_SHIFTS_ROW = (
+    InlineKeyboardButton(
+        '↩️ Вернуться к списку смен', callback_data='back_to_shifts'
+    ),
+)
+
 logger = logging.getLogger(__name__)
 
 
+def _log_notify_error(future: asyncio.Future) -> None:
+    """Логирует ошибку постановки уведомления в очередь."""
+    if future.cancelled():
+        return
+    exc = future.exception()
+    if exc:
+        logger.error('Не удалось отправить уведомление: %s', exc)
+
+
+def _notify(chat_id: int, text: str) -> None:
+    """Ставит уведомление в очередь Celery в фоновом потоке.
+
+    Отправка задачи брокеру блокирует сокет, поэтому выполняется вне
+    цикла событий и не задерживает ответ пользователю.
+    """
+    future = asyncio.get_running_loop().run_in_executor(
+        None, partial(activity_manager.delay, chat_id=chat_id, text=text)
+    )
+    future.add_done_callback(_log_notify_error)
+
+
 class ChangeBookingHandler:
     """Обработчик изменения бронирования слотов бариста."""
 
-    def __init__(self) -> None:
-        """Инициализация обработчика."""
-        self.reservation_crud = reservation_crud
-        self.shift_crud = shift_crud
-        self.user_crud = crud_user
+    __slots__ = ()
 
     async def change_booking_start(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -50,7 +110,7 @@ class ChangeBookingHandler:
         # Получаем cafe_id менеджера
         user_id = update.effective_user.id
         async with async_session_maker() as session:
-            user = await self.user_crud.get_by_telegram_id(user_id, session)
+            user = await crud_user.get_by_telegram_id(user_id, session)
             if not user or not user.cafe_id:
                 await message.reply_text(
                     'Ошибка: вы не привязаны к кафе или не авторизованы.'
@@ -61,23 +121,17 @@ class ChangeBookingHandler:
 
         # Предлагаем выбрать дату
         today = date.today()
+        tomorrow = today + timedelta(days=1)
         buttons = [
             [
                 InlineKeyboardButton(
-                    'Сегодня', callback_data=f'select_date_{today}'
+                    'Сегодня', callback_data=f'{CB_DATE_PREFIX}{today}'
                 ),
                 InlineKeyboardButton(
-                    'Завтра',
-                    callback_data=(
-                        f'select_date_{today.replace(day=today.day + 1)}'
-                    ),
+                    'Завтра', callback_data=f'{CB_DATE_PREFIX}{tomorrow}'
                 ),
             ],
-            [
-                InlineKeyboardButton(
-                    '❌ Отменить', callback_data='cancel_change_booking'
-                )
-            ],
+            _CANCEL_ROW,
         ]
         keyboard = InlineKeyboardMarkup(buttons)
 
@@ -101,8 +155,9 @@ class ChangeBookingHandler:
         query = update.callback_query
         await query.answer()
 
-        selected_date = query.data.replace('select_date_', '')
-        context.user_data['selected_date'] = selected_date
+        context.user_data['selected_date'] = date.fromisoformat(
+            query.data.removeprefix(CB_DATE_PREFIX)
+        )
 
         return await self.show_shifts_for_date(update, context)
 
@@ -114,12 +169,10 @@ class ChangeBookingHandler:
         cafe_id = context.user_data['cafe_id']
         selected_date = context.user_data['selected_date']
 
-        async with async_session_maker() as session:
-            start_datetime = datetime.strptime(selected_date, '%Y-%m-%d')
-            end_datetime = datetime.combine(
-                start_datetime.date(), datetime.max.time()
-            )
+        start_datetime = datetime.combine(selected_date, time.min)
+        end_datetime = datetime.combine(selected_date, time.max)
 
+        async with async_session_maker() as session:
             shifts = await shift_crud.get_multi(
                 session=session,
                 cafe_id=cafe_id,
@@ -133,26 +186,22 @@ class ChangeBookingHandler:
                 )
                 return await show_start_menu(update, context)
 
-            buttons = []
-            for shift in shifts:
-                status = await self._get_shift_status(shift, session)
-                btn_text = (
-                    f'{shift.start_time.strftime("%H:%M")}-'
-                    f'{shift.end_time.strftime("%H:%M")}'
-                    f' {status}'
-                )
-
-                buttons.append([
+            counts = await reservation_crud.count_by_status_for_shifts(
+                [shift.id for shift in shifts], session
+            )
+            buttons = [
+                [
                     InlineKeyboardButton(
-                        btn_text, callback_data=f'select_shift_{shift.id}'
+                        f'{shift.start_time:%H:%M}-{shift.end_time:%H:%M} '
+                        + self._get_shift_status(
+                            shift, counts.get(shift.id, {})
+                        ),
+                        callback_data=f'{CB_SHIFT_PREFIX}{shift.id}',
                     )
-                ])
-
-            buttons.append([
-                InlineKeyboardButton(
-                    '❌ Отменить', callback_data='cancel_change_booking'
-                )
-            ])
+                ]
+                for shift in shifts
+            ]
+            buttons.append(_CANCEL_ROW)
 
             keyboard = InlineKeyboardMarkup(buttons)
             await query.edit_message_text(
@@ -169,14 +218,19 @@ class ChangeBookingHandler:
         query = update.callback_query
         await query.answer()
 
-        shift_id = int(query.data.replace('select_shift_', ''))
-        context.user_data['shift_id'] = shift_id
+        if query.data.startswith(CB_SHIFT_PREFIX):
+            shift_id = int(query.data.removeprefix(CB_SHIFT_PREFIX))
+            context.user_data['shift_id'] = shift_id
+        else:
+            # Возврат из выбора бариста — смена уже выбрана
+            shift_id = context.user_data['shift_id']
 
         async with async_session_maker() as session:
-            shift = await self.shift_crud.get(shift_id, session)
-            reservations = await self.reservation_crud.get_by_shift(
+            shift = await shift_crud.get(shift_id, session)
+            reservations = await reservation_crud.get_by_shift(
                 shift_id, session
             )
+            time_range = f'{shift.start_time:%H:%M}-{shift.end_time:%H:%M}'
             buttons = []
             if not reservations:
                 buttons.append(
@@ -188,33 +242,33 @@ class ChangeBookingHandler:
                     ],
                 )
                 message = (
-                    f'Смена {shift.start_time.strftime("%H:%M")}-'
-                    f'{shift.end_time.strftime("%H:%M")} полностью свободна.\n'
+                    f'Смена {time_range} полностью свободна.\n'
                     f'Вы можете назначить баристу:'
                 )
             else:
-                for reservation in reservations:
-                    barista = await self.user_crud.get(
-                        reservation.barista_id, session
-                    )
-                    buttons.append(
-                        [
-                            InlineKeyboardButton(
-                                f'❌ бронь {barista.name}',
-                                callback_data=f'remove_booking_{reservation.id}',
+                baristas_by_id = await crud_user.get_by_ids(
+                    (r.barista_id for r in reservations), session
+                )
+                buttons = [
+                    [
+                        InlineKeyboardButton(
+                            '❌ бронь '
+                            f'{baristas_by_id[reservation.barista_id].name}',
+                            callback_data=(
+                                f'{CB_REMOVE_PREFIX}{reservation.id}'
                             ),
-                            InlineKeyboardButton(
-                                '🔄 Заменить',
-                                callback_data=f'change_barista_{reservation.id}',
+                        ),
+                        InlineKeyboardButton(
+                            '🔄 Заменить',
+                            callback_data=(
+                                f'{CB_CHANGE_PREFIX}{reservation.id}'
                             ),
-                        ],
-                    )
+                        ),
+                    ]
+                    for reservation in reservations
+                ]
 
-                    message = (
-                        f'Смена {shift.start_time.strftime("%H:%M")}-'
-                        f'{shift.end_time.strftime("%H:%M")}\n'
-                        f'Текущие бронирования:'
-                    )
+                message = f'Смена {time_range}\nТекущие бронирования:'
 
                 if len(reservations) < shift.barista_count:
                     buttons.append(
@@ -225,11 +279,7 @@ class ChangeBookingHandler:
                             )
                         ],
                     )
-            buttons.append([
-                InlineKeyboardButton(
-                    '↩️ Вернуться к списку смен', callback_data='back_to_shifts'
-                )
-            ])
+            buttons.append(_BACK_TO_SHIFTS_ROW)
             keyboard = InlineKeyboardMarkup(buttons)
             await query.edit_message_text(message, reply_markup=keyboard)
 
@@ -243,118 +293,105 @@ class ChangeBookingHandler:
         await query.answer()
 
         action = query.data
-        shift_id = context.user_data['shift_id']
-
         if action == 'back_to_shifts':
             return await self.show_shifts_for_date(update, context)
 
-        async with async_session_maker() as session:
-            shift = await self.shift_crud.get(shift_id, session)
-
-        if action.startswith('remove_booking_'):
-            reservation_id = int(query.data.replace('remove_booking_', ''))
-            context.user_data['reservation_id'] = reservation_id
-            reservation = await self.reservation_crud.get(
-                reservation_id, session
-            )
-
-            # Удаляем бронирование
-            if reservation:
-                barista = await self.user_crud.get(
-                    reservation.barista_id, session
-                )
-                await self.reservation_crud.remove(reservation, session)
-                await session.commit()
-
-                # Отправляем уведомление бариста
-                try:
-                    activity_manager.delay(
-                        chat_id=barista.telegram_id,
-                        text=(
-                            f'Ваша бронь на слот '
-                            f'{shift.start_time.strftime("%H:%M")}-'
-                            f'{shift.end_time.strftime("%H:%M")} '
-                            # f'{shift.date} была отменена.'
-                            f' была отменена.'
-                        ),
-                    )
-                except Exception as e:
-                    logger.error(f'Не удалось отправить уведомление: {e}')
-
-                await query.edit_message_text(
-                    'Бронирование успешно отменено.',
-                    reply_markup=None,
-                )
-            else:
-                await query.edit_message_text(
-                    'Ошибка: бронирование не найдено.',
-                    reply_markup=None,
-                )
-
-            # return ConversationHandler.END
+        # Префикс действия - callback_data без числового идентификатора
+        prefix = action.rstrip('0123456789')
+        handler = self._ACTIONS.get(prefix)
+        if handler is None:
             return await show_start_menu(update, context)
 
-        if action.startswith('assign_barista'):
-            # Показываем список доступных бариста
-            baristas = await self.user_crud.get_multi_by_role(
-                'barista', session
+        async with async_session_maker() as session:
+            return await handler(
+                self,
+                update,
+                context,
+                int(action.removeprefix(prefix) or 0),
+                session,
             )
-            context.user_data['reservation_id'] = None
-            async with async_session_maker() as session:
-                shift = await self.shift_crud.get(shift_id, session)
-            buttons = []
-            for barista in baristas:
-                buttons.append([
-                    InlineKeyboardButton(
-                        barista.name,
-                        callback_data=f'select_barista_{barista.id}',
-                    )
-                ])
 
-            buttons.append([
-                InlineKeyboardButton('↩️ Назад', callback_data='back_to_shift')
-            ])
+    async def _remove_booking(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        reservation_id: int,
+        session: AsyncSession,
+    ) -> int:
+        """Удаляет бронирование и уведомляет бариста."""
+        query = update.callback_query
+        shift = await shift_crud.get(context.user_data['shift_id'], session)
+        time_range = f'{shift.start_time:%H:%M}-{shift.end_time:%H:%M}'
+        barista = await reservation_crud.remove_and_return_barista(
+            reservation_id, session
+        )
+        if barista:
+            # Отправляем уведомление бариста
+            _notify(
+                chat_id=barista.telegram_id,
+                text=(
+                    f'Ваша бронь на слот {time_range} '
+                    # f'{shift.date} была отменена.'
+                    f' была отменена.'
+                ),
+            )
 
-            keyboard = InlineKeyboardMarkup(buttons)
             await query.edit_message_text(
-                'Выберите бариста для этого слота:',
-                reply_markup=keyboard,
+                'Бронирование успешно отменено.',
+                reply_markup=None,
+            )
+        else:
+            await query.edit_message_text(
+                'Ошибка: бронирование не найдено.',
+                reply_markup=None,
             )
 
-            return SELECT_BARISTA
+        # return ConversationHandler.END
+        return await show_start_menu(update, context)
 
-        if action.startswith('change_barista_'):
-            # Показываем список доступных бариста
-            baristas = await self.user_crud.get_multi_by_role(
-                'barista', session
-            )
-            reservation_id = int(query.data.replace('change_barista_', ''))
-            context.user_data['reservation_id'] = reservation_id
-            reservation = await self.reservation_crud.get(
-                reservation_id, session
-            )
-            buttons = []
-            for barista in baristas:
-                buttons.append([
-                    InlineKeyboardButton(
-                        barista.name,
-                        callback_data=f'select_barista_{barista.id}',
-                    )
-                ])
+    async def _choose_barista(
+        self,
+        update: Update,
+        context: ContextTypes.DEFAULT_TYPE,
+        reservation_id: int,
+        session: AsyncSession,
+    ) -> int:
+        """Показывает список бариста для назначения или замены.
 
-            buttons.append([
-                InlineKeyboardButton('↩️ Назад', callback_data='back_to_shift')
-            ])
+        reservation_id равен 0, если назначается дополнительный бариста.
+        """
+        shift_id = context.user_data['shift_id']
+        baristas = await crud_user.get_multi_by_role_cached(
+            'barista', session
+        )
+        buttons = [
+            [
+                InlineKeyboardButton(
+                    barista_name,
+                    callback_data=(
+                        f'{CB_BARISTA_PREFIX}'
+                        f'{barista_id}_{shift_id}_{reservation_id}'
+                    ),
+                )
+            ]
+            for barista_id, barista_name, _ in baristas
+        ]
+        buttons.append(_BACK_TO_SHIFT_ROW)
 
-            keyboard = InlineKeyboardMarkup(buttons)
-            await query.edit_message_text(
-                'Выберите бариста для этого слота:',
-                reply_markup=keyboard,
-            )
+        keyboard = InlineKeyboardMarkup(buttons)
+        await update.callback_query.edit_message_text(
+            'Выберите бариста для этого слота:',
+            reply_markup=keyboard,
+        )
 
-            return SELECT_BARISTA
+        return SELECT_BARISTA
 
-        return await show_start_menu(update, context)
+    # Действия экрана бронирования по префиксу callback_data
+    _ACTIONS = MappingProxyType({
+        CB_REMOVE_PREFIX: _remove_booking,
+        CB_CHANGE_PREFIX: _choose_barista,
+        'assign_barista': _choose_barista,
+    })
 
     async def select_barista(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -363,66 +400,70 @@ class ChangeBookingHandler:
         query = update.callback_query
         await query.answer()
 
-        barista_id = int(query.data.replace('select_barista_', ''))
-        shift_id = context.user_data['shift_id']
-        reservation_id = context.user_data['reservation_id']
+        # Все идентификаторы приходят в callback_data: обработчик не
+        # зависит от user_data и переживает перезапуск бота
+        barista_id, shift_id, reservation_id = map(
+            int, query.data.removeprefix(CB_BARISTA_PREFIX).split('_')
+        )
         old_reservation = None
 
         async with async_session_maker() as session:
-            shift = await self.shift_crud.get(shift_id, session)
-            barista = await self.user_crud.get(barista_id, session)
-
             if reservation_id:
-                old_reservation = await self.reservation_crud.get(
-                    reservation_id, session
+                # Бронь приходит сразу со сменой и текущим бариста
+                old_reservation = (
+                    await reservation_crud.get_one_with_related(
+                        reservation_id, session
+                    )
                 )
+                if not old_reservation:
+                    # Бронь удалили, пока выбирали бариста: новую не создаем
+                    await query.edit_message_text(
+                        'Ошибка: бронирование не найдено.',
+                        reply_markup=None,
+                    )
+                    return await show_start_menu(update, context)
+            if old_reservation:
+                shift = old_reservation.shift
+            else:
+                shift = await shift_crud.get(shift_id, session)
+            barista = await crud_user.get(barista_id, session)
+            time_range = f'{shift.start_time:%H:%M}-{shift.end_time:%H:%M}'
+
             # Создаем или обновляем бронирование
             if old_reservation:
                 # Уведомляем старого бариста
-                old_barista = await self.user_crud.get(
-                    old_reservation.barista_id, session
+                _notify(
+                    chat_id=old_reservation.barista.telegram_id,
+                    text=(
+                        f'Ваша бронь на слот {time_range} '
+                        # f'{shift.date} была отменена.'
+                        f' была отменена.'
+                    ),
                 )
-                try:
-                    activity_manager.delay(
-                        chat_id=old_barista.telegram_id,
-                        text=(
-                            f'Ваша бронь на слот '
-                            f'{shift.start_time.strftime("%H:%M")}-'
-                            f'{shift.end_time.strftime("%H:%M")} '
-                            # f'{shift.date} была отменена.'
-                            f' была отменена.'
-                        ),
-                    )
-                except Exception as e:
-                    logger.error(f'Не удалось отправить уведомление: {e}')
 
                 # Обновляем бронирование
-                reservation_update = ReservationUpdate(
-                    barista_id=barista_id, status='onconfirm'
-                )
-                await self.reservation_crud.update(
-                    old_reservation, reservation_update, session
+                await reservation_crud.update_bulk_fields(
+                    old_reservation.id,
+                    {
+                        'barista_id': barista_id,
+                        'status': ReservationStatus.ONCONFIRM,
+                    },
+                    session,
                 )
             else:
                 # Создаем новое бронирование
-                await self.reservation_crud.create_with_status(
-                    barista_id, shift_id, 'onconfirm', session
+                await reservation_crud.create_with_status(
+                    barista_id, shift_id, ReservationStatus.ONCONFIRM, session
                 )
-            await session.commit()
             # Уведомляем нового бариста
-            try:
-                activity_manager.delay(
-                    chat_id=barista.telegram_id,
-                    text=(
-                        f'Вам назначен слот '
-                        f'{shift.start_time.strftime("%H:%M")}-'
-                        # f'{shift.end_time.strftime("%H:%M")} {shift.date}. '
-                        f'{shift.end_time.strftime("%H:%M")}. '
-                        f'Пожалуйста, подтвердите или отклоните бронь.'
-                    ),
-                )
-            except Exception as e:
-                logger.error(f'Не удалось отправить уведомление: {e}')
+            _notify(
+                chat_id=barista.telegram_id,
+                text=(
+                    # f'Вам назначен слот {time_range} {shift.date}. '
+                    f'Вам назначен слот {time_range}. '
+                    f'Пожалуйста, подтвердите или отклоните бронь.'
+                ),
+            )
 
             await query.edit_message_text(
                 f'Бариста {barista.name} успешно назначен на слот.',
@@ -431,43 +472,27 @@ class ChangeBookingHandler:
 
         return await show_start_menu(update, context)
 
-    async def _get_shift_status(
-        self, shift: Shift, session: AsyncSession
+    def _get_shift_status(
+        self, shift: Shift, status_counts: dict[str, int]
     ) -> str:
-        """Определяет статус смены на основе резерваций."""
-        await session.refresh(shift, ['reservations'])
-
-        if not shift.reservations:
+        """Определяет статус смены по числу броней в каждом статусе."""
+        if not status_counts:
             return '🟢 Свободна'
 
-        status_labels = {
-            'RESERVED': 'забронировано',
-            'ONCONFIRM': 'на подтверждении',
-            'ATTENDED': 'присутствовал',
-            'CANCELLED': 'отменено',
-        }
-
-        status_counts = {}
-        for r in shift.reservations:
-            status_name = r.status.name
-            status_counts[status_name] = status_counts.get(status_name, 0) + 1
-
         status_stats = '\n' + '\n'.join(
-            f'{status_labels[status]}: {count}'
-            for status, count in sorted(status_counts.items())
+            f'{_STATUS_LABELS[status]}: {status_counts[status]}'
+            for status in _STATUS_ORDER
+            if status in status_counts
         )
 
-        active_reservations = [
-            r
-            for r in shift.reservations
-            if r.status
-            in [
+        active_count = sum(
+            status_counts.get(status.name, 0)
+            for status in (
                 ReservationStatus.RESERVED,
                 ReservationStatus.ONCONFIRM,
                 ReservationStatus.ATTENDED,
-            ]
-        ]
-        active_count = len(active_reservations)
+            )
+        )
 
         if active_count >= shift.barista_count:
             return f'🔴 Заполнена{status_stats}'
@@ -498,40 +523,38 @@ class ChangeBookingHandler:
             entry_points=[
                 CommandHandler('change_booking', self.change_booking_start),
                 CallbackQueryHandler(
-                    self.change_booking_start, pattern='^change_booking$'
+                    self.change_booking_start, pattern=_PAT_START
                 ),
             ],
             states={
                 SELECT_DATE: [
                     CallbackQueryHandler(
-                        self.select_date, pattern='^select_date_'
+                        self.select_date, pattern=_PAT_SELECT_DATE
                     ),
                     CallbackQueryHandler(
-                        self.cancel_change_booking,
-                        pattern='^cancel_change_booking$',
+                        self.cancel_change_booking, pattern=_PAT_CANCEL
                     ),
                 ],
                 SELECT_SHIFT: [
                     CallbackQueryHandler(
-                        self.select_shift, pattern='^select_shift_'
+                        self.select_shift, pattern=_PAT_SELECT_SHIFT
                     ),
                     CallbackQueryHandler(
-                        self.cancel_change_booking,
-                        pattern='^cancel_change_booking$',
+                        self.cancel_change_booking, pattern=_PAT_CANCEL
                     ),
                 ],
                 CHANGE_BOOKING: [
                     CallbackQueryHandler(
                         self.handle_booking_change,
-                        pattern='^(remove_booking_|change_barista_|assign_barista|back_to_shifts)',
+                        pattern=_PAT_CHANGE_BOOKING,
                     ),
                 ],
                 SELECT_BARISTA: [
                     CallbackQueryHandler(
-                        self.select_barista, pattern='^select_barista_'
+                        self.select_barista, pattern=_PAT_SELECT_BARISTA
                     ),
                     CallbackQueryHandler(
-                        self.select_shift, pattern='^back_to_shift$'
+                        self.select_shift, pattern=_PAT_BACK_TO_SHIFT
                     ),
                 ],
             },
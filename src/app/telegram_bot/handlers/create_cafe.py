@@ -1,9 +1,21 @@
 """Модуль создания кафе с интерактивным интерфейсом."""
 
 import logging
+import re
+from collections import deque
 from datetime import time
-
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from types import MappingProxyType
+
+from pydantic import ValidationError as SchemaValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from telegram import (
+    CallbackQuery,
+    InlineKeyboardButton,
+    InlineKeyboardMarkup,
+    Message,
+    Update,
+)
+from telegram.error import BadRequest, RetryAfter, TelegramError, TimedOut
 from telegram.ext import (
     Application,
     CallbackQueryHandler,
@@ -11,20 +23,129 @@ from telegram.ext import (
     ContextTypes,
     ConversationHandler,
     MessageHandler,
+    TypeHandler,
     filters,
 )
 
 from app.core.db import async_session_maker
 from app.crud.cafe_crud import cafe_crud
 from app.crud.user_crud import crud_user
+from app.exceptions import BaseAppException
 from app.schemas.cafe_schema import CafeCreate
 from app.telegram_bot.commands import cancel, show_start_menu
+from app.telegram_bot.utils import delete_messages
 
 logger = logging.getLogger(__name__)
 
 # Состояния для создания кафе
 EDIT_CAFE_FIELDS, SELECT_MANAGER = range(2)
 
+# Время бездействия, после которого диалог завершается, секунды
+CONVERSATION_TIMEOUT = 600
+
+# Префиксы коротких callback_data: ec_<код поля>, cm_<id менеджера>
+CB_EDIT_FIELD_PREFIX = 'ec_'
+CB_MANAGER_PREFIX = 'cm_'
+
+# Шаблоны callback_data с именованными группами для разбора параметров
+_PAT_EDIT_FIELD = re.compile(rf'^{CB_EDIT_FIELD_PREFIX}(?P<code>[a-z])$')
+_PAT_SELECT_MANAGER = re.compile(
+    rf'^{CB_MANAGER_PREFIX}(?P<mid>\d+)$|^back_to_edit$'
+)
+
+# Время в формате ЧЧ:ММ
+_TIME_RE = re.compile(r'^([01]?\d|2[0-3]):([0-5]\d)$')
+
+# Редактируемые поля кафе: поле, код в callback_data и подпись
+_FIELDS = (
+    ('name', 'n', 'Название'),
+    ('city', 'c', 'Город'),
+    ('address', 'a', 'Адрес'),
+    ('open_time', 'o', 'Время открытия (ЧЧ:ММ)'),
+    ('close_time', 't', 'Время закрытия (ЧЧ:ММ)'),
+    ('phone', 'p', 'Телефон'),
+    ('description', 'd', 'Описание'),
+    ('manager_id', 'm', 'Менеджер'),
+)
+_FIELD_BY_CODE = MappingProxyType({code: field for field, code, _ in _FIELDS})
+# Неизменяемый шаблон данных нового кафе
+_CAFE_TEMPLATE = MappingProxyType({
+    'name': None,
+    'city': None,
+    'address': None,
+    'open_time': None,
+    'close_time': None,
+    'phone': None,
+    'description': None,
+    'manager_id': None,
+    'is_active': True,
+})
+# Поля, без которых кафе не сохраняется
+_REQUIRED_FIELDS = (
+    'name', 'city', 'address', 'open_time', 'close_time', 'phone'
+)
+_FIELD_PROMPTS = MappingProxyType({
+    'name': 'Введите название кафе:',
+    'city': 'Введите город:',
+    'address': 'Введите адрес кафе:',
+    'open_time': 'Введите время открытия (ЧЧ:ММ):',
+    'close_time': 'Введите время закрытия (ЧЧ:ММ):',
+    'phone': 'Введите телефон кафе:',
+    'description': 'Введите описание кафе:',
+})
+_FOOTER_ROW = (
+    InlineKeyboardButton('✅ Сохранить кафе', callback_data='save_cafe'),
+    InlineKeyboardButton('❌ Отменить', callback_data='cancel_cafe_creation'),
+)
+
+
+# Сколько последних сообщений бота хранится для удаления
+_MAX_TRACKED_MESSAGES = 16
+# Временные данные диалога в user_data, очищаемые при его завершении
+_TRANSIENT_KEYS = ('new_cafe', 'last_bot_messages', 'editing_field')
+
+
+async def _safe_edit(
+    query: CallbackQuery,
+    text: str,
+    reply_markup: InlineKeyboardMarkup | None = None,
+) -> Message | None:
+    """Редактирует сообщение с учетом флуд-контроля Telegram.
+
+    Обновления обрабатываются последовательно, поэтому при RetryAfter
+    обработчик не ждет (это остановило бы бота для всех чатов) и не
+    шлет других запросов в том же окне, а пропускает правку.
+
+    Returns:
+        Отредактированное сообщение или None, если правка пропущена.
+
+    """
+    try:
+        return await query.edit_message_text(text, reply_markup=reply_markup)
+    except RetryAfter as e:
+        logger.warning(
+            'Flood control on edit (retry after %s), edit skipped',
+            e.retry_after,
+        )
+        return None
+
+
+def _remember_message(
+    context: ContextTypes.DEFAULT_TYPE, message_id: int
+) -> None:
+    """Сохраняет ID сообщения бота для последующего удаления."""
+    context.user_data.setdefault(
+        'last_bot_messages', deque(maxlen=_MAX_TRACKED_MESSAGES)
+    ).append(message_id)
+
+
+def _field_value(cafe_data: dict, field: str) -> str:
+    """Возвращает значение поля для подписи кнопки."""
+    if field == 'manager_id' and cafe_data[field]:
+        # Имя сохраняется при выборе менеджера
+        return cafe_data.get('manager_name', 'Неизвестный')
+    return cafe_data[field] or 'Не указано'
+
 
 class CreateCafeHandler:
     """Обработчик создания кафе с интерактивным интерфейсом."""
@@ -32,24 +153,21 @@ class CreateCafeHandler:
     def __init__(self) -> None:
         """Инициализация обработчика."""
         self.cafe_crud = cafe_crud
-        self.cafe_data_template = {
-            'name': None,
-            'city': None,
-            'address': None,
-            'open_time': None,
-            'close_time': None,
-            'phone': None,
-            'description': None,
-            'manager_id': None,
-            'is_active': True
-        }
-
-    async def initialize_cafe_data(
-        self, context: ContextTypes.DEFAULT_TYPE
-    ) -> None:
+        # Клавиатура выбора менеджера и список, по которому она собрана
+        self._manager_keyboard: (
+            tuple[list[tuple[int, str, int]], InlineKeyboardMarkup] | None
+        ) = None
+
+    def _init_cafe_data(self, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Инициализирует данные нового кафе."""
         if 'new_cafe' not in context.user_data:
-            context.user_data['new_cafe'] = self.cafe_data_template.copy()
+            context.user_data['new_cafe'] = dict(_CAFE_TEMPLATE)
+
+    @staticmethod
+    def _clear_data(context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Удаляет временные данные диалога из user_data."""
+        for key in _TRANSIENT_KEYS:
+            context.user_data.pop(key, None)
 
     async def create_cafe_start(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -59,7 +177,7 @@ class CreateCafeHandler:
         if query:
             await query.answer()
 
-        await self.initialize_cafe_data(context)
+        self._init_cafe_data(context)
         return await self.edit_cafe_fields(update, context)
 
     async def edit_cafe_fields(
@@ -70,43 +188,18 @@ class CreateCafeHandler:
         if query:
             await query.answer()
 
-        await self.initialize_cafe_data(context)
         cafe_data = context.user_data['new_cafe']
 
-        buttons = []
-        fields = [
-            ('name', 'Название'),
-            ('city', 'Город'),
-            ('address', 'Адрес'),
-            ('open_time', 'Время открытия (ЧЧ:ММ)'),
-            ('close_time', 'Время закрытия (ЧЧ:ММ)'),
-            ('phone', 'Телефон'),
-            ('description', 'Описание'),
-            ('manager_id', 'Менеджер'),
-        ]
-
-        for field, label in fields:
-            field_value = cafe_data[field] or 'Не указано'
-            if field == 'manager_id' and cafe_data[field]:
-                async with async_session_maker() as session:
-                    manager = await crud_user.get(cafe_data[field], session)
-                    field_value = manager.name if manager else 'Неизвестный'
-
-            buttons.append([
+        buttons = [
+            [
                 InlineKeyboardButton(
-                    f'{label}: {field_value}',
-                    callback_data=f'edit_cafe_{field}',
+                    f'{label}: {_field_value(cafe_data, field)}',
+                    callback_data=f'{CB_EDIT_FIELD_PREFIX}{code}',
                 )
-            ])
-
-        buttons.append([
-            InlineKeyboardButton(
-                '✅ Сохранить кафе', callback_data='save_cafe'
-            ),
-            InlineKeyboardButton(
-                '❌ Отменить', callback_data='cancel_cafe_creation'
-            ),
-        ])
+            ]
+            for field, code, label in _FIELDS
+        ]
+        buttons.append(_FOOTER_ROW)
 
         keyboard = InlineKeyboardMarkup(buttons)
         message = 'Заполните данные кафе:\n'
@@ -114,10 +207,10 @@ class CreateCafeHandler:
         try:
             if query:
                 try:
-                    await query.edit_message_text(
-                        message, reply_markup=keyboard
-                    )
-                except Exception as e:
+                    await _safe_edit(query, message, keyboard)
+                except (BadRequest, TimedOut) as e:
+                    if 'not modified' in str(e):
+                        return EDIT_CAFE_FIELDS
                     logger.warning('Failed to edit message: %s', e)
                     await context.bot.send_message(
                         chat_id=update.effective_chat.id,
@@ -130,7 +223,7 @@ class CreateCafeHandler:
                     text=message,
                     reply_markup=keyboard,
                 )
-        except Exception as e:
+        except TelegramError as e:
             logger.error('Error in edit_cafe_fields: %s', e)
             return ConversationHandler.END
 
@@ -143,32 +236,22 @@ class CreateCafeHandler:
         query = update.callback_query
         await query.answer()
 
-        field = query.data.replace('edit_cafe_', '')
+        field = _FIELD_BY_CODE.get(context.matches[0].group('code'))
+        if field is None:
+            return await self.edit_cafe_fields(update, context)
         context.user_data['editing_field'] = field
 
         if field == 'manager_id':
             return await self.select_manager(update, context)
 
-        field_prompts = {
-            'name': 'Введите название кафе:',
-            'city': 'Введите город:',
-            'address': 'Введите адрес кафе:',
-            'open_time': 'Введите время открытия (ЧЧ:ММ):',
-            'close_time': 'Введите время закрытия (ЧЧ:ММ):',
-            'phone': 'Введите телефон кафе:',
-            'description': 'Введите описание кафе:',
-        }
-
         # Отправляем сообщение с запросом ввода
-        message = await query.edit_message_text(
-            field_prompts[field],
-            reply_markup=None
-        )
+        message = await _safe_edit(query, _FIELD_PROMPTS[field])
+        if message is None:
+            # Запрос не показан: меню остается прежним, ввод не ожидаем
+            context.user_data.pop('editing_field', None)
+            return EDIT_CAFE_FIELDS
 
-        # Сохраняем ID сообщения бота для последующего удаления
-        if 'last_bot_messages' not in context.user_data:
-            context.user_data['last_bot_messages'] = []
-        context.user_data['last_bot_messages'].append(message.message_id)
+        _remember_message(context, message.message_id)
 
         return EDIT_CAFE_FIELDS
 
@@ -179,34 +262,54 @@ class CreateCafeHandler:
         query = update.callback_query
         await query.answer()
 
-        async with async_session_maker() as session:
-            managers = await crud_user.get_multi_by_role('manager', session)
+        keyboard = self._build_manager_keyboard(await self._get_managers())
+        message = await _safe_edit(
+            query, 'Выберите менеджера для кафе:', keyboard
+        )
+        if message is None:
+            # Список не показан: остаемся в меню полей
+            context.user_data.pop('editing_field', None)
+            return EDIT_CAFE_FIELDS
+
+        _remember_message(context, message.message_id)
+
+        return SELECT_MANAGER
 
-            buttons = []
-            for manager in managers:
-                buttons.append([
+    def _build_manager_keyboard(
+        self, managers: list[tuple[int, str, int]]
+    ) -> InlineKeyboardMarkup:
+        """Возвращает клавиатуру менеджеров, собирая ее раз на список.
+
+        Кэш CRUD отдает один и тот же объект списка до сброса или
+        истечения TTL, поэтому новый список означает новые данные.
+        """
+        if (
+            self._manager_keyboard is None
+            or self._manager_keyboard[0] is not managers
+        ):
+            buttons = [
+                [
                     InlineKeyboardButton(
-                        f'{manager.name} (ID: {manager.telegram_id})',
-                        callback_data=f'select_manager_{manager.id}',
+                        f'{name} (ID: {telegram_id})',
+                        callback_data=f'{CB_MANAGER_PREFIX}{manager_id}',
                     )
-                ])
-
+                ]
+                for manager_id, name, telegram_id in managers
+            ]
             buttons.append([
                 InlineKeyboardButton('⏪ Назад', callback_data='back_to_edit')
             ])
+            self._manager_keyboard = (managers, InlineKeyboardMarkup(buttons))
+        return self._manager_keyboard[1]
 
-            keyboard = InlineKeyboardMarkup(buttons)
-            message = await query.edit_message_text(
-                'Выберите менеджера для кафе:', reply_markup=keyboard
+    @staticmethod
+    async def _get_managers() -> list[tuple[int, str, int]]:
+        """Возвращает менеджеров из кэша CRUD, сбрасываемого при записи."""
+        async with async_session_maker() as session:
+            return await crud_user.get_multi_by_role_cached(
+                'manager', session
             )
 
-            # Сохраняем ID сообщения бота для последующего удаления
-            if 'last_bot_messages' not in context.user_data:
-                context.user_data['last_bot_messages'] = []
-            context.user_data['last_bot_messages'].append(message.message_id)
-
-        return SELECT_MANAGER
-
     async def process_manager_selection(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> int:
@@ -214,12 +317,17 @@ class CreateCafeHandler:
         query = update.callback_query
         await query.answer()
 
-        if query.data == 'back_to_edit':
+        manager_id = context.matches[0].group('mid')
+        if manager_id is None:
+            # Нажата кнопка «Назад»
             return await self.edit_cafe_fields(update, context)
 
-        manager_id = int(query.data.replace('select_manager_', ''))
-        await self.initialize_cafe_data(context)
+        manager_id = int(manager_id)
+        names = {mid: name for mid, name, _ in await self._get_managers()}
         context.user_data['new_cafe']['manager_id'] = manager_id
+        context.user_data['new_cafe']['manager_name'] = names.get(
+            manager_id, 'Неизвестный'
+        )
 
         return await self.edit_cafe_fields(update, context)
 
@@ -236,36 +344,26 @@ class CreateCafeHandler:
 
         value = update.message.text
 
-        try:
-            if field in ['open_time', 'close_time']:
-                hours, minutes = map(int, value.split(':'))
-                value = time(hours, minutes)
-            elif field == 'phone' and not value.startswith('+'):
-                value = f'+{value}'
-        except Exception as e:
-            logger.error('Error processing field %s: %s', field, e)
-            await update.message.reply_text('Некорректный формат данных.')
-            return EDIT_CAFE_FIELDS
-
-        # Удаляем предыдущие сообщения бота (запросы на ввод)
-        if 'last_bot_messages' in context.user_data:
-            for msg_id in context.user_data['last_bot_messages']:
-                try:
-                    await context.bot.delete_message(
-                        chat_id=update.effective_chat.id,
-                        message_id=msg_id,
-                    )
-                except Exception as e:
-                    logger.error(f"Error deleting message {msg_id}: {e}")
-            del context.user_data['last_bot_messages']
-
-        # Удаляем сообщение пользователя с вводом данных
-        await context.bot.delete_message(
-            chat_id=update.effective_chat.id,
-            message_id=update.message.message_id,
+        if field in ('open_time', 'close_time'):
+            match = _TIME_RE.match(value.strip())
+            if match is None:
+                await update.message.reply_text('Некорректный формат данных.')
+                return EDIT_CAFE_FIELDS
+            value = time(int(match.group(1)), int(match.group(2)))
+        elif field == 'phone' and not value.startswith('+'):
+            value = f'+{value}'
+
+        # Удаляем предыдущие сообщения бота (запросы на ввод) и сообщение
+        # пользователя с вводом данных в фоне, не задерживая новое меню
+        msg_ids = [
+            *context.user_data.pop('last_bot_messages', ()),
+            update.message.message_id,
+        ]
+        context.application.create_task(
+            delete_messages(context.bot, update.effective_chat.id, msg_ids),
+            update=update,
         )
 
-        await self.initialize_cafe_data(context)
         context.user_data['new_cafe'][field] = value
 
         return await self.edit_cafe_fields(update, context)
@@ -277,27 +375,18 @@ class CreateCafeHandler:
         query = update.callback_query
         await query.answer()
 
-        await self.initialize_cafe_data(context)
         cafe_data = context.user_data['new_cafe']
 
-        required_fields = [
-            'name',
-            'city',
-            'address',
-            'open_time',
-            'close_time',
-            'phone'
-        ]
-        missing_fields = [
-            field for field in required_fields if not cafe_data.get(field)
-        ]
+        missing_fields = tuple(
+            field for field in _REQUIRED_FIELDS if not cafe_data.get(field)
+        )
 
         if missing_fields:
-            await query.edit_message_text(
+            return await show_start_menu(
+                update,
+                context,
                 f'Ошибка: не заполнены поля: {", ".join(missing_fields)}!',
-                reply_markup=None,
             )
-            return await show_start_menu(update, context)
 
         try:
             cafe_create = CafeCreate(**cafe_data)
@@ -305,22 +394,20 @@ class CreateCafeHandler:
                 cafe = await cafe_crud.create(
                     obj_in=cafe_create, session=session
                 )
-
-            await query.edit_message_text(
-                f'Кафе по адресу: город {cafe.city}, {cafe.address} успешно '
-                f'создано!',
-                reply_markup=None,
-            )
-        except Exception as e:
+        except (
+            SchemaValidationError, BaseAppException, SQLAlchemyError
+        ) as e:
             logger.error('Error creating cafe: %s', e)
-            await query.edit_message_text(
-                'Ошибка при создании кафе', reply_markup=None
+            result = 'Ошибка при создании кафе'
+        else:
+            result = (
+                f'Кафе по адресу: город {cafe.city}, {cafe.address} успешно '
+                f'создано!'
             )
 
-        if 'new_cafe' in context.user_data:
-            del context.user_data['new_cafe']
+        self._clear_data(context)
 
-        return await show_start_menu(update, context)
+        return await show_start_menu(update, context, result)
 
     async def cancel_cafe_creation(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -329,14 +416,17 @@ class CreateCafeHandler:
         query = update.callback_query
         await query.answer()
 
-        await query.edit_message_text(
-            'Создание кафе отменено', reply_markup=None
-        )
+        self._clear_data(context)
 
-        if 'new_cafe' in context.user_data:
-            del context.user_data['new_cafe']
+        return await show_start_menu(
+            update, context, 'Создание кафе отменено'
+        )
 
-        return await show_start_menu(update, context)
+    async def _on_timeout(
+        self, update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """Очищает данные незавершенного диалога по таймауту."""
+        self._clear_data(context)
 
     def get_conversation_handler(self) -> ConversationHandler:
         """Возвращает обработчик диалога создания кафе."""
@@ -350,7 +440,7 @@ class CreateCafeHandler:
             states={
                 EDIT_CAFE_FIELDS: [
                     CallbackQueryHandler(
-                        self.edit_cafe_field, pattern='^edit_cafe_'
+                        self.edit_cafe_field, pattern=_PAT_EDIT_FIELD
                     ),
                     CallbackQueryHandler(
                         self.save_cafe, pattern='^save_cafe$'
@@ -367,12 +457,16 @@ class CreateCafeHandler:
                 SELECT_MANAGER: [
                     CallbackQueryHandler(
                         self.process_manager_selection,
-                        pattern='^select_manager_|^back_to_edit$',
+                        pattern=_PAT_SELECT_MANAGER,
                     )
                 ],
+                ConversationHandler.TIMEOUT: [
+                    TypeHandler(Update, self._on_timeout)
+                ],
             },
             fallbacks=[CommandHandler('cancel', cancel)],
             per_message=False,
+            conversation_timeout=CONVERSATION_TIMEOUT,
         )
 
     def setup_handlers(self, application: Application) -> None:
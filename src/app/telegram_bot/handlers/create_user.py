@@ -1,5 +1,8 @@
 import asyncio
 import logging
+import re
+from types import MappingProxyType
+from typing import Optional
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
@@ -12,39 +15,128 @@ from telegram.ext import (
     filters,
 )
 
+from app.core.constants import MIN_LENGTH_PASSWORD
 from app.core.db import async_session_maker
 from app.crud.cafe_crud import cafe_crud
 from app.crud.user_crud import crud_user
+from app.models.cafe import Cafe
+from app.models.user import User
 from app.schemas.user_schema import UserCreate
-from app.tasks.barista_start import notify_manager_about_barista
 from app.telegram_bot.commands import cancel, show_start_menu
 
 logger = logging.getLogger(__name__)
 
 SELECT_ROLE, EDIT_FIELDS, SELECT_CAFE = range(3)
 
+# Через сколько секунд удаляется сообщение об ошибке ввода
+ERROR_MESSAGE_TTL = 3
+
 SELF_TG_ID = "" #Для проверки уведомлений добавьте свой тг
 
+# Скомпилированные шаблоны callback_data для обработчиков диалога
+_PAT_CREATE_USER = re.compile(r"^create_user$")
+_PAT_REGISTER = re.compile(r"^register_barista$")
+_PAT_ROLE = re.compile(r"^role_")
+_PAT_EDIT_FIELD = re.compile(r"^edit_user_")
+_PAT_SAVE = re.compile(r"^save_user$")
+_PAT_SELECT_CAFE = re.compile(r"^user_select_cafe$")
+_PAT_CANCEL = re.compile(r"^cancel_creation$")
+_PAT_SET_CAFE = re.compile(r"^set_cafe_|^back_to_edit$")
+
+# Ответ на действия, пришедшие до завершения предыдущего обработчика
+_BUSY_TEXT = "Подождите, предыдущее действие еще выполняется."
+
+# Номер телефона: цифры с необязательным «+» в начале
+_PHONE_RE = re.compile(r"^\+?(\d+)$")
+
+
+def _keep(value: str) -> str:
+    """Возвращает значение без изменений."""
+    return value
+
+
+def _validate_telegram_id(value: str) -> int:
+    """Проверяет Telegram ID и приводит его к числу."""
+    if not value.isdigit():
+        raise ValueError("Telegram ID должен содержать только цифры.")
+    return int(value)
+
+
+def _validate_password(value: str) -> str:
+    """Проверяет минимальную длину пароля."""
+    if len(value) < MIN_LENGTH_PASSWORD:
+        raise ValueError(
+            f"Пароль должен содержать минимум {MIN_LENGTH_PASSWORD} символов."
+        )
+    return value
+
+
+def _normalize_phone(value: str) -> str:
+    """Проверяет номер телефона и приводит его к виду +XXXXXXXXXXX."""
+    match = _PHONE_RE.match(value)
+    if match is None:
+        raise ValueError(
+            "Телефон должен содержать только цифры и может начинаться с «+»."
+        )
+    return f"+{match.group(1)}"
+
+
+# Проверка и нормализация ввода по полю; поля без проверки не изменяются
+_VALIDATORS = MappingProxyType({
+    "telegram_id": _validate_telegram_id,
+    "password": _validate_password,
+    "phone": _normalize_phone,
+})
+
+# Поля нового пользователя
+_USER_FIELDS = ("name", "telegram_id", "phone", "role", "password", "cafe_id")
+
+# Ключи user_data, которые живут только в рамках диалога
+_TRANSIENT_KEYS = (
+    "new_user",
+    "is_self_registering",
+    "last_prompt_message_id",
+    "last_keyboard_message_id",
+    "editing_field",
+    "cafe_map",
+    "cafe_address",
+)
+
+# Клавиатура выбора роли нового пользователя
+_ROLE_KEYBOARD = InlineKeyboardMarkup(
+    [
+        [InlineKeyboardButton("Администратор", callback_data="role_admin")],
+        [InlineKeyboardButton("Менеджер", callback_data="role_manager")],
+        [InlineKeyboardButton("Бариста", callback_data="role_barista")],
+    ]
+)
+# Редактируемые поля пользователя и их подписи
+_FIELDS = (
+    ("name", "Имя"),
+    ("telegram_id", "Telegram ID"),
+    ("phone", "Телефон"),
+    ("password", "Пароль"),
+)
+_SAVE_CANCEL_ROWS = (
+    (InlineKeyboardButton("✅ Сохранить", callback_data="save_user"),),
+    (InlineKeyboardButton("❌ Отменить", callback_data="cancel_creation"),),
+)
+
 
 class CreateUserHandler:
     """Обработчик для диалога создания пользователя."""
 
-    def __init__(self) -> None:
-        """Инициализация."""
-        self.user_data_template = {
-            "name": None,
-            "telegram_id": None,
-            "phone": None,
-            "role": None,
-            "password": None,
-            "cafe_id": None,
-        }
+    __slots__ = ()
 
-    async def _initialize_data(
-        self, context: ContextTypes.DEFAULT_TYPE
-    ) -> None:
-        if "new_user" not in context.user_data:
-            context.user_data["new_user"] = self.user_data_template.copy()
+    def _initialize_data(self, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Создает пустые данные нового пользователя, если их нет."""
+        context.user_data.setdefault("new_user", dict.fromkeys(_USER_FIELDS))
+
+    @staticmethod
+    def _clear_data(context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Удаляет временные данные диалога из user_data."""
+        for key in _TRANSIENT_KEYS:
+            context.user_data.pop(key, None)
 
     async def start_by_admin(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -54,28 +146,10 @@ class CreateUserHandler:
         if query:
             await query.answer()
 
-        await self._initialize_data(context)
+        self._initialize_data(context)
         context.user_data["is_self_registering"] = False
 
-        keyboard = InlineKeyboardMarkup(
-            [
-                [
-                    InlineKeyboardButton(
-                        "Администратор", callback_data="role_admin"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        "Менеджер", callback_data="role_manager"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        "Бариста", callback_data="role_barista"
-                    )
-                ],
-            ]
-        )
+        keyboard = _ROLE_KEYBOARD
         message = "Выберите роль нового пользователя:"
 
         if query:
@@ -92,7 +166,7 @@ class CreateUserHandler:
         """Вход для саморегистрации."""
         query = update.callback_query
         await query.answer()
-        await self._initialize_data(context)
+        self._initialize_data(context)
 
         # Сразу устанавливаем флаг, роль и telegram_id
         context.user_data["is_self_registering"] = True
@@ -118,6 +192,10 @@ class CreateUserHandler:
     ) -> int:
         """Отображение полей пользователя для редактирования."""
         query = update.callback_query
+        user_data = context.user_data["new_user"]
+        role = user_data["role"]
+        is_self_reg = context.user_data.get("is_self_registering", False)
+
         if query:
             try:
                 await context.bot.delete_message(
@@ -127,19 +205,8 @@ class CreateUserHandler:
             except Exception as e:
                 logger.warning(f"Не удалось удалить сообщение: {e}")
 
-        user_data = context.user_data["new_user"]
-        role = user_data["role"]
-        is_self_reg = context.user_data.get("is_self_registering", False)
-
         buttons = []
-        fields_map = {
-            "name": "Имя",
-            "telegram_id": "Telegram ID",
-            "phone": "Телефон",
-            "password": "Пароль",
-        }
-
-        for field, label in fields_map.items():
+        for field, label in _FIELDS:
             # Пропускаем кнопку Telegram ID при саморегистрации
             if field == "telegram_id" and is_self_reg:
                 continue
@@ -157,11 +224,8 @@ class CreateUserHandler:
             )
 
         if role in ["barista", "manager"]:
-            cafe_text = "Не выбрано"
-            if user_data["cafe_id"]:
-                async with async_session_maker() as session:
-                    cafe = await cafe_crud.get(user_data["cafe_id"], session)
-                    cafe_text = cafe.address if cafe else "Неизвестное кафе"
+            # Адрес сохраняется при выборе кафе
+            cafe_text = context.user_data.get("cafe_address", "Не выбрано")
             buttons.append(
                 [
                     InlineKeyboardButton(
@@ -170,20 +234,7 @@ class CreateUserHandler:
                 ]
             )
 
-        buttons.extend(
-            [
-                [
-                    InlineKeyboardButton(
-                        "✅ Сохранить", callback_data="save_user"
-                    )
-                ],
-                [
-                    InlineKeyboardButton(
-                        "❌ Отменить", callback_data="cancel_creation"
-                    )
-                ],
-            ]
-        )
+        buttons.extend(_SAVE_CANCEL_ROWS)
         keyboard = InlineKeyboardMarkup(buttons)
         message = (
             "Заполните свои данные:"
@@ -231,21 +282,18 @@ class CreateUserHandler:
         return EDIT_FIELDS
 
     @staticmethod
-    async def _delete_message_after_delay(
-        context: ContextTypes.DEFAULT_TYPE,
-        chat_id: int,
-        message_id: int,
-        delay: int = 3
+    async def _delete_messages_job(
+        context: ContextTypes.DEFAULT_TYPE
     ) -> None:
-        """Удаляет сообщение после задержки."""
-        await asyncio.sleep(delay)
-        try:
-            await context.bot.delete_message(
-                chat_id=chat_id,
-                message_id=message_id
-            )
-        except Exception:
-            pass
+        """Задача JobQueue: удаляет сообщения из job.data."""
+        for message_id in context.job.data:
+            try:
+                await context.bot.delete_message(
+                    chat_id=context.job.chat_id,
+                    message_id=message_id
+                )
+            except Exception:
+                pass
 
     async def process_field_input(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -256,50 +304,34 @@ class CreateUserHandler:
             return ConversationHandler.END
 
         value = update.message.text
-        asyncio.create_task(
-            self._delete_message_after_delay(
-                context,
-                update.effective_chat.id,
-                update.message.message_id,
-            )
-        )
         try:
-            if field == "telegram_id" and not value.isdigit():
-                raise ValueError("Telegram ID должен содержать только цифры.")
-            if field == "password" and len(value) < 6:
-                raise ValueError("Пароль должен содержать минимум 6 символов.")
-            if field == "phone" and not value.startswith("+"):
-                value = f"+{value}"
-            if field == "telegram_id":
-                value = int(value)
+            value = _VALIDATORS.get(field, _keep)(value)
         except ValueError as e:
             msg = await update.message.reply_text(str(e))
-            await asyncio.sleep(3)
-            await context.bot.delete_message(
-                chat_id=update.effective_chat.id,
-                message_id=msg.message_id
-            )
-            await context.bot.delete_message(
+            # Ошибку и ввод удаляем через JobQueue, не задерживая диалог
+            context.job_queue.run_once(
+                self._delete_messages_job,
+                when=ERROR_MESSAGE_TTL,
                 chat_id=update.effective_chat.id,
-                message_id=update.message.message_id
+                data=(msg.message_id, update.message.message_id),
             )
             return EDIT_FIELDS
 
         context.user_data["new_user"][field] = value
 
-        await context.bot.delete_message(
-            chat_id=update.effective_chat.id,
-            message_id=update.message.message_id
-        )
-
+        # Ввод пользователя и запрос бота удаляем одновременно
+        message_ids = [update.message.message_id]
         if "last_prompt_message_id" in context.user_data:
-            try:
-                await context.bot.delete_message(
-                    chat_id=update.effective_chat.id,
-                    message_id=context.user_data["last_prompt_message_id"]
+            message_ids.append(context.user_data["last_prompt_message_id"])
+        await asyncio.gather(
+            *(
+                context.bot.delete_message(
+                    chat_id=update.effective_chat.id, message_id=message_id
                 )
-            except Exception:
-                pass
+                for message_id in message_ids
+            ),
+            return_exceptions=True,
+        )
 
         return await self.edit_fields(update, context)
 
@@ -310,14 +342,16 @@ class CreateUserHandler:
         query = update.callback_query
         await query.answer()
         async with async_session_maker() as session:
-            cafes = await cafe_crud.get_multi(session)
+            cafes = await cafe_crud.get_addresses_cached(session)
+        # Адреса нужны set_cafe, чтобы не запрашивать выбранное кафе снова
+        context.user_data["cafe_map"] = dict(cafes)
         buttons = [
             [
                 InlineKeyboardButton(
-                    cafe.address, callback_data=f"set_cafe_{cafe.id}"
+                    address, callback_data=f"set_cafe_{cafe_id}"
                 )
             ]
-            for cafe in cafes
+            for cafe_id, address in cafes
         ]
         buttons.append(
             [InlineKeyboardButton("⏪ Назад", callback_data="back_to_edit")]
@@ -337,8 +371,30 @@ class CreateUserHandler:
             return await self.edit_fields(update, context)
         cafe_id = int(query.data.replace("set_cafe_", ""))
         context.user_data["new_user"]["cafe_id"] = cafe_id
+        context.user_data["cafe_address"] = context.user_data.get(
+            "cafe_map", {}
+        ).get(cafe_id, "Неизвестное кафе")
         return await self.edit_fields(update, context)
 
+    @staticmethod
+    async def _create_user(
+        user_data: dict, with_cafe: bool
+    ) -> tuple[User, Optional[Cafe]]:
+        """Создает пользователя и при необходимости загружает его кафе.
+
+        Кафе с менеджером загружается в той же сессии, что и создание.
+        """
+        async with async_session_maker() as session:
+            user = await crud_user.create(
+                obj_in=UserCreate(**user_data), session=session
+            )
+            cafe = None
+            if with_cafe:
+                cafe = await cafe_crud.get_with_manager(
+                    cafe_id=user_data["cafe_id"], session=session
+                )
+        return user, cafe
+
     async def save_user(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> int:
@@ -364,12 +420,9 @@ class CreateUserHandler:
             ] and not user_data.get("cafe_id"):
                 raise ValueError("Для этой роли необходимо выбрать кафе.")
 
-            user_create = UserCreate(**user_data)
-            async with async_session_maker() as session:
-                user = await crud_user.create(
-                    obj_in=user_create, session=session
-                )
-            if context.user_data["is_self_registering"] is False:
+            is_self_reg = context.user_data["is_self_registering"]
+            user, cafe = await self._create_user(user_data, is_self_reg)
+            if is_self_reg is False:
                 await query.edit_message_text(
                     f"Пользователь {user.name} успешно создан!"
                 )
@@ -378,11 +431,10 @@ class CreateUserHandler:
                     f"Спасибо {user.name} за регистрацию,"
                     "ожидайте подтверждения от управляющего."
                 )
-                cafe = await cafe_crud.get_with_manager(
-                    cafe_id=user_data["cafe_id"],
-                    session=session
-                )
                 if cafe and cafe.manager:
+                    from app.tasks.barista_start import (
+                        notify_manager_about_barista,
+                    )
                     notify_manager_about_barista.delay(
                         manager_tg_id=SELF_TG_ID,
                         #manager_tg_id=cafe.manager.telegram_id
@@ -394,14 +446,7 @@ class CreateUserHandler:
             logger.error(f"Error creating user: {e}", exc_info=True)
             await query.edit_message_text(f"Ошибка при создании: {e}")
 
-        if "new_user" in context.user_data:
-            del context.user_data["new_user"]
-        if "is_self_registering" in context.user_data:
-            del context.user_data["is_self_registering"]
-        if "last_prompt_message_id" in context.user_data:
-            del context.user_data["last_prompt_message_id"]
-        if "last_keyboard_message_id" in context.user_data:
-            del context.user_data["last_keyboard_message_id"]
+        self._clear_data(context)
         return await show_start_menu(update, context)
 
     async def cancel_creation(
@@ -415,37 +460,46 @@ class CreateUserHandler:
             'Создание пользователя отменено', reply_markup=None
         )
 
-        if 'new_user' in context.user_data:
-            del context.user_data['new_user']
-        if "is_self_registering" in context.user_data:
-            del context.user_data["is_self_registering"]
+        self._clear_data(context)
 
         return await show_start_menu(update, context)
 
+    @staticmethod
+    async def _notify_busy(
+        update: Update, context: ContextTypes.DEFAULT_TYPE
+    ) -> None:
+        """Просит подождать, пока выполняется предыдущий обработчик."""
+        if update.callback_query:
+            await update.callback_query.answer(_BUSY_TEXT)
+        else:
+            await update.effective_message.reply_text(_BUSY_TEXT)
+
     def get_conversation_handler(self) -> ConversationHandler:
         """Возвращает ConversationHandler для создания пользователя."""
         return ConversationHandler(
             entry_points=[
                 CallbackQueryHandler(
-                    self.start_by_admin, pattern="^create_user$"
+                    self.start_by_admin, pattern=_PAT_CREATE_USER
                 ),
                 CallbackQueryHandler(
-                    self.self_register_start, pattern="^register_barista$"
+                    self.self_register_start, pattern=_PAT_REGISTER
                 ),
             ],
             states={
                 SELECT_ROLE: [
-                    CallbackQueryHandler(self.select_role, pattern="^role_")
+                    CallbackQueryHandler(self.select_role, pattern=_PAT_ROLE)
                 ],
                 EDIT_FIELDS: [
                     CallbackQueryHandler(
-                        self.edit_field_prompt, pattern="^edit_user_"
+                        self.edit_field_prompt, pattern=_PAT_EDIT_FIELD
                     ),
+                    # Сохранение остается блокирующим: повторное нажатие во
+                    # время записи не должно создать пользователя дважды
                     CallbackQueryHandler(
-                        self.save_user, pattern="^save_user$"
+                        self.save_user, pattern=_PAT_SAVE, block=True
                     ),
                     CallbackQueryHandler(
-                        self.select_cafe, pattern="^user_select_cafe$"
+                        self.select_cafe, pattern=_PAT_SELECT_CAFE
                     ),
                     MessageHandler(
                         filters.TEXT & ~filters.COMMAND,
@@ -453,21 +507,38 @@ class CreateUserHandler:
                     ),
                     CallbackQueryHandler(
                         self.cancel_creation,
-                        pattern='^cancel_creation$',
+                        pattern=_PAT_CANCEL,
                     ),
                 ],
                 SELECT_CAFE: [
                     CallbackQueryHandler(
-                        self.set_cafe, pattern="^set_cafe_|^back_to_edit$"
+                        self.set_cafe, pattern=_PAT_SET_CAFE
                     )
                 ],
+                # Пока неблокирующий обработчик не завершился, новые
+                # обновления диалога сюда попадают вместо прежнего
+                # состояния; без этого они молча отбрасываются
+                ConversationHandler.WAITING: [
+                    CallbackQueryHandler(self._notify_busy),
+                    MessageHandler(
+                        filters.TEXT & ~filters.COMMAND, self._notify_busy
+                    ),
+                ],
             },
             fallbacks=[
                 CommandHandler("cancel", cancel),
             ],
+            # per_message=True невозможен из-за MessageHandler ввода полей;
+            # состояние хранится по паре (чат, пользователь)
+            per_chat=True,
+            per_user=True,
             per_message=False,
             name="create_user_conversation",
             persistent=False,
+            # Обработчики ждут БД и Telegram, поэтому не блокируют
+            # обработку обновлений других пользователей; повторный ввод
+            # того же пользователя в это время получает ответ из WAITING
+            block=False,
         )
 
     def setup_handlers(self, application: Application) -> None:
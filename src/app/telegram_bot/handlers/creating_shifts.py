@@ -1,8 +1,12 @@
 """Модуль создания кафе с интерактивным интерфейсом."""
 
 import logging
-from datetime import datetime, time
+import re
+from calendar import monthrange
+from datetime import date, datetime, time
+from types import MappingProxyType
 
+from sqlalchemy.ext.asyncio import AsyncSession
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
     Application,
@@ -18,6 +22,7 @@ from app.core.db import async_session_maker
 from app.crud.cafe_crud import cafe_crud
 from app.crud.shift_crud import shift_crud
 from app.crud.user_crud import crud_user
+from app.exceptions import CafeNotFoundError
 from app.schemas.shift_schema import ShiftCreate
 from app.telegram_bot.commands import cancel, show_start_menu
 
@@ -26,6 +31,125 @@ logger = logging.getLogger(__name__)
 # Состояния для создания кафе
 EDIT_SHIFT_FIELDS, CONFIRM_SHIFT_DATA = range(2)
 
+# Поля слота и подписи кнопок в порядке отображения
+_FIELDS = (
+    ('date', 'Дата смены (ДД.MM.ГГГГ)'),
+    ('start_time', 'Время начала смены (ЧЧ:ММ)'),
+    ('end_time', 'Время окончания смены(ЧЧ:ММ)'),
+    ('barista_count', 'Количество бариста в смену'),
+    ('cafe_id', 'ID кафе'),
+)
+# Поля, без которых смена не сохраняется
+_REQUIRED_FIELDS = (
+    'date', 'start_time', 'end_time', 'barista_count', 'cafe_id'
+)
+_FIELD_PROMPTS = MappingProxyType({
+    'date': 'Дата смены (ДД.ММ.ГГГГ):',
+    'start_time': 'Время начала смены (ЧЧ:ММ):',
+    'end_time': 'Время окончания смены(ЧЧ:ММ):',
+    'barista_count': 'Количество бариста в смену:',
+    'cafe_id': 'ID кафе:',
+})
+_SHIFT_TEMPLATE = MappingProxyType({
+    'date': None,
+    'start_time': None,
+    'end_time': None,
+    'barista_count': None,
+    'cafe_id': None,
+})
+# Форматы значений на кнопках совпадают с форматами ввода
+_FORMATTERS = MappingProxyType({
+    'date': lambda value: value.strftime('%d.%m.%Y'),
+    'start_time': lambda value: value.strftime('%H:%M'),
+    'end_time': lambda value: value.strftime('%H:%M'),
+})
+
+_DATE_RE = re.compile(r'^(\d{1,2})\.(\d{1,2})\.(\d{4})$')
+_TIME_RE = re.compile(r'^([01]?\d|2[0-3]):([0-5]\d)$')
+
+# Неизменяемые клавиатуры собираются один раз при импорте
+_SAVE_CANCEL_ROW = (
+    InlineKeyboardButton('✅ Сохранить слот', callback_data='save_shift'),
+    InlineKeyboardButton(
+        '❌ Отменить', callback_data='cancel_shift_creation'
+    ),
+)
+_START_KEYBOARD = InlineKeyboardMarkup((
+    (
+        InlineKeyboardButton(
+            '➕ Создать новую смену',
+            callback_data='proceed_to_create_shift',
+        ),
+    ),
+    (
+        InlineKeyboardButton(
+            '❌ Отменить', callback_data='cancel_shift_creation'
+        ),
+    ),
+))
+_BACK_TO_EDITING_KEYBOARD = InlineKeyboardMarkup((
+    (
+        InlineKeyboardButton(
+            '← Вернуться к редактированию',
+            callback_data='continue_creating_shifts',
+        ),
+    ),
+))
+_BACK_TO_CREATING_KEYBOARD = InlineKeyboardMarkup((
+    (
+        InlineKeyboardButton(
+            '← Вернуться к созданию смены',
+            callback_data='continue_creating_shifts',
+        ),
+    ),
+))
+_CONTINUE_KEYBOARD = InlineKeyboardMarkup((
+    (
+        InlineKeyboardButton('Да', callback_data='continue_creating_shifts'),
+        InlineKeyboardButton('Нет', callback_data='finish_creating_shifts'),
+    ),
+))
+
+
+def _parse_date(text: str) -> date | None:
+    """Разбирает дату в формате ДД.ММ.ГГГГ или возвращает None."""
+    match = _DATE_RE.match(text.strip())
+    if match is None:
+        return None
+    day, month, year = map(int, match.groups())
+    if not (year and 1 <= month <= 12):
+        return None
+    if not 1 <= day <= monthrange(year, month)[1]:
+        return None
+    return date(year, month, day)
+
+
+def _parse_time(text: str) -> time | None:
+    """Разбирает время в формате ЧЧ:ММ или возвращает None."""
+    match = _TIME_RE.match(text.strip())
+    if match is None:
+        return None
+    return time(int(match[1]), int(match[2]))
+
+
+def _parse_int(text: str) -> int | None:
+    """Разбирает целое неотрицательное число или возвращает None."""
+    text = text.strip()
+    return int(text) if text.isdecimal() else None
+
+
+# Разбор введенного текста по полю; None означает некорректный ввод
+_PARSERS = MappingProxyType({
+    'date': _parse_date,
+    'start_time': _parse_time,
+    'end_time': _parse_time,
+    'barista_count': _parse_int,
+    'cafe_id': _parse_int,
+})
+_PARSE_ERRORS = MappingProxyType({
+    'barista_count': 'Количество бариста должно быть числом.',
+})
+
 
 class CreateShiftHandler:
     """Обработчик создания слота в интерактивным интерфейсом."""
@@ -33,45 +157,39 @@ class CreateShiftHandler:
     def __init__(self) -> None:
         """Инициализация обработчика."""
         self.shift_crud = shift_crud
-        self.shift_data_template = {
-            'date': None,
-            'start_time': None,
-            'end_time': None,
-            'barista_count': None,
-            'cafe_id': None,
-        }
 
     async def initialize_shift_data(
         self, context: ContextTypes.DEFAULT_TYPE, user_id: int = None
     ) -> None:
         """Инициализирует данные нового слота."""
         if 'new_shift' not in context.user_data:
-            # Получаем cafe_id из таблицы пользователей
+            # Кафе пользователя и часы его работы берутся из кэшей CRUD
             cafe_id = None
             start_time = None
             end_time = None
             if user_id:
                 async with async_session_maker() as session:
-                    user = await crud_user.get_by_telegram_id(user_id, session)
-                    if user and user.cafe_id:
-                        cafe_id = user.cafe_id
-            if cafe_id:
-                async with async_session_maker() as session:
-                    cafe = await cafe_crud.get_or_404(cafe_id, session)
-                    if cafe and cafe.open_time:
-                        start_time = cafe.open_time
-                    if cafe and cafe.close_time:
-                        end_time = cafe.close_time
-            # Создаем шаблон с предзаполненным cafe_id
-            self.shift_data_template = {
-                'date': datetime.now().date(),
-                'start_time': start_time,
-                'end_time': end_time,
-                'barista_count': None,
-                'cafe_id': cafe_id,  # Предзаполняем cafe_id
-            }
-
-            context.user_data['new_shift'] = self.shift_data_template.copy()
+                    cafe_id = await crud_user.get_cafe_id_cached(
+                        user_id, session
+                    )
+                    if cafe_id:
+                        start_time, end_time = (
+                            await cafe_crud.get_hours_cached(cafe_id, session)
+                        )
+                if cafe_id:
+                    # Часы работы нужны в save_shift, время смены
+                    # пользователь может изменить
+                    context.user_data['new_shift_cafe'] = (
+                        cafe_id, start_time, end_time
+                    )
+            # Создаем черновик с предзаполненным cafe_id
+            context.user_data['new_shift'] = dict(
+                _SHIFT_TEMPLATE,
+                date=date.today(),
+                start_time=start_time,
+                end_time=end_time,
+                cafe_id=cafe_id,
+            )
 
     async def edit_shift_fields(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
@@ -81,20 +199,19 @@ class CreateShiftHandler:
         if query:
             await query.answer()  #
 
-        await self.initialize_shift_data(context)
-        shift_data = context.user_data['new_shift']
+        # Данные создаются на входе в диалог (create_shift_start)
+        shift_data = context.user_data.get('new_shift')
+        if shift_data is None:
+            return await show_start_menu(update, context)
 
         buttons = []
-        fields = [
-            ('date', 'Дата смены (ДД.MM.ГГГГ)'),
-            ('start_time', 'Время начала смены (ЧЧ:ММ)'),
-            ('end_time', 'Время окончания смены(ЧЧ:ММ)'),
-            ('barista_count', 'Количество бариста в смену'),
-            ('cafe_id', 'ID кафе'),
-        ]
-
-        for field, label in fields:
-            field_value = shift_data[field] or 'Не указано'
+        for field, label in _FIELDS:
+            value = shift_data[field]
+            field_value = (
+                _FORMATTERS.get(field, str)(value)
+                if value is not None
+                else 'Не указано'
+            )
             buttons.append([
                 InlineKeyboardButton(
                     f'{label}: {field_value}',
@@ -102,14 +219,7 @@ class CreateShiftHandler:
                 )
             ])
 
-        buttons.append([
-            InlineKeyboardButton(
-                '✅ Сохранить слот', callback_data='save_shift'
-            ),
-            InlineKeyboardButton(
-                '❌ Отменить', callback_data='cancel_shift_creation'
-            ),
-        ])
+        buttons.append(_SAVE_CANCEL_ROW)
 
         keyboard = InlineKeyboardMarkup(buttons)
         message = 'Заполните данные слота:\n'
@@ -143,15 +253,8 @@ class CreateShiftHandler:
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> int:
         """Переходит к созданию новой смены после показа списка."""
-        query = update.callback_query
-        await query.answer()
-
-        # Удаляем сообщение со списком смен
-        await context.bot.delete_message(
-            chat_id=update.effective_chat.id,
-            message_id=query.message.message_id,
-        )
-
+        # Сообщение со списком смен редактируется на месте:
+        # edit_shift_fields сам отвечает на callback
         return await self.edit_shift_fields(update, context)
 
     async def create_shift_start(
@@ -179,14 +282,12 @@ class CreateShiftHandler:
 
                 # Формируем список смен
                 if shifts:
-                    shifts_list = ''
-                    for i, shift in enumerate(shifts, 1):
-                        shifts_list += (
-                            f'{i}. {shift.start_time.strftime("%d.%m.%Y")} '
-                            f'{shift.start_time.strftime("%H:%M")}-'
-                            f'{shift.end_time.strftime("%H:%M")}\n'
-                            f'   👥 Бариста: {shift.barista_count}\n'
-                        )
+                    shifts_list = '\n'.join(
+                        f'{i}. {s.start_time:%d.%m.%Y} '
+                        f'{s.start_time:%H:%M}-{s.end_time:%H:%M}\n'
+                        f'   👥 Бариста: {s.barista_count}'
+                        for i, s in enumerate(shifts, 1)
+                    )
                     message = (
                         f'📅 Текущие смены кафе:\n'
                         f'{shifts_list}\n\nВыберите действие:'
@@ -197,31 +298,15 @@ class CreateShiftHandler:
                         'Выберите действие:'
                     )
 
-                # Кнопки для продолжения
-                keyboard = InlineKeyboardMarkup([
-                    [
-                        InlineKeyboardButton(
-                            '➕ Создать новую смену',
-                            callback_data='proceed_to_create_shift',
-                        )
-                    ],
-                    [
-                        InlineKeyboardButton(
-                            '❌ Отменить',
-                            callback_data='cancel_shift_creation',
-                        )
-                    ],
-                ])
-
                 if query:
                     await query.edit_message_text(
-                        message, reply_markup=keyboard
+                        message, reply_markup=_START_KEYBOARD
                     )
                 else:
                     await context.bot.send_message(
                         chat_id=update.effective_chat.id,
                         text=message,
-                        reply_markup=keyboard,
+                        reply_markup=_START_KEYBOARD,
                     )
 
                 return CONFIRM_SHIFT_DATA
@@ -242,15 +327,9 @@ class CreateShiftHandler:
         field = query.data.replace('edit_shift_', '')
         context.user_data['editing_field'] = field
 
-        field_prompts = {
-            'date': 'Дата смены (ДД.ММ.ГГГГ):',
-            'start_time': 'Время начала смены (ЧЧ:ММ):',
-            'end_time': 'Время окончания смены(ЧЧ:ММ):',
-            'barista_count': 'Количество бариста в смену:',
-            'cafe_id': 'ID кафе:',
-        }
-
-        await query.edit_message_text(field_prompts[field], reply_markup=None)
+        await query.edit_message_text(
+            _FIELD_PROMPTS[field], reply_markup=None
+        )
         return EDIT_SHIFT_FIELDS
 
     async def process_shift_field_input(
@@ -264,34 +343,21 @@ class CreateShiftHandler:
             )
             return await show_start_menu(update, context)
 
-        value = update.message.text
+        value = _PARSERS[field](update.message.text)
+        if value is None:
+            await update.message.reply_text(
+                _PARSE_ERRORS.get(field, 'Некорректный формат данных.')
+            )
+            return EDIT_SHIFT_FIELDS
+        if field == 'date' and value < date.today():
+            await update.message.reply_text(
+                'Дата должна быть текущей или позже.'
+            )
+            return EDIT_SHIFT_FIELDS
 
-        try:
-            if field == 'date':
-                value = datetime.strptime(value, '%d.%m.%Y').date()
-                if value < datetime.now().date():
-                    await update.message.reply_text(
-                        'Дата должна быть текущей или позже.'
-                    )
-                    return EDIT_SHIFT_FIELDS
-            elif field in ['start_time', 'end_time']:
-                hours, minutes = map(int, value.split(':'))
-                value = time(hours, minutes)
-            elif field == 'barista_count':
-                if not value.isdigit():
-                    await update.message.reply_text(
-                        'Количество бариста должно быть числом.'
-                    )
-                    return EDIT_SHIFT_FIELDS
-                value = int(value)
-            elif field == 'cafe_id':
-                value = int(value)
-        except Exception as e:
-            logger.error('Error processing field %s: %s', field, e)
-            await update.message.reply_text('Некорректный формат данных.')
+        if field == 'cafe_id' and not await self._cafe_exists(update, value):
             return EDIT_SHIFT_FIELDS
 
-        await self.initialize_shift_data(context)
         context.user_data['new_shift'][field] = value
 
         await context.bot.delete_message(
@@ -301,6 +367,27 @@ class CreateShiftHandler:
 
         return await self.edit_shift_fields(update, context)
 
+    @staticmethod
+    async def _cafe_exists(update: Update, cafe_id: int) -> bool:
+        """Проверяет наличие кафе и сообщает, если его нет."""
+        async with async_session_maker() as session:
+            cafe_exists = await cafe_crud.exists(cafe_id, session)
+        if not cafe_exists:
+            await update.message.reply_text('Кафе с таким ID не найдено.')
+        return cafe_exists
+
+    @staticmethod
+    async def _get_cafe_hours(
+        context: ContextTypes.DEFAULT_TYPE,
+        cafe_id: int,
+        session: AsyncSession,
+    ) -> tuple[time, time]:
+        """Возвращает часы работы кафе из черновика или из кэша."""
+        snapshot = context.user_data.get('new_shift_cafe')
+        if snapshot and snapshot[0] == cafe_id:
+            return snapshot[1:]
+        return await cafe_crud.get_hours_cached(cafe_id, session)
+
     async def save_shift(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> int:
@@ -308,18 +395,12 @@ class CreateShiftHandler:
         query = update.callback_query
         await query.answer()
 
-        await self.initialize_shift_data(context)
-        shift_data = context.user_data['new_shift']
+        shift_data = context.user_data.get('new_shift')
+        if shift_data is None:
+            return await show_start_menu(update, context)
 
-        required_fields = [
-            'date',
-            'start_time',
-            'end_time',
-            'barista_count',
-            'cafe_id',
-        ]
         missing_fields = [
-            field for field in required_fields if not shift_data.get(field)
+            field for field in _REQUIRED_FIELDS if not shift_data.get(field)
         ]
 
         if missing_fields:
@@ -340,26 +421,18 @@ class CreateShiftHandler:
 
             # Проверка корректности времени (конец после начала)
             if end_dt <= start_dt:
-                keyboard = InlineKeyboardMarkup([
-                    [
-                        InlineKeyboardButton(
-                            '← Вернуться к редактированию',
-                            callback_data='continue_creating_shifts',
-                        )
-                    ]
-                ])
                 await query.edit_message_text(
                     '❌ Ошибка:время окончания должно быть позже начала!',
-                    reply_markup=keyboard,
+                    reply_markup=_BACK_TO_EDITING_KEYBOARD,
                 )
                 return EDIT_SHIFT_FIELDS
 
             async with async_session_maker() as session:
-                # Получаем данные кафе для проверки времени работы
-                cafe = await cafe_crud.get_or_404(
-                    shift_data['cafe_id'], session
-                )
-                if not cafe:
+                try:
+                    open_time, close_time = await self._get_cafe_hours(
+                        context, shift_data['cafe_id'], session
+                    )
+                except CafeNotFoundError:
                     await query.edit_message_text(
                         '❌ Ошибка: кафе не найдено!', reply_markup=None
                     )
@@ -367,53 +440,31 @@ class CreateShiftHandler:
 
                 # Проверка времени работы кафе
                 if (
-                    shift_data['start_time'] < cafe.open_time
-                    or shift_data['end_time'] > cafe.close_time
+                    shift_data['start_time'] < open_time
+                    or shift_data['end_time'] > close_time
                 ):
-                    keyboard = InlineKeyboardMarkup([
-                        [
-                            InlineKeyboardButton(
-                                '← Вернуться к созданию смены',
-                                callback_data='continue_creating_shifts',
-                            )
-                        ]
-                    ])
                     await query.edit_message_text(
                         f'❌ Ошибка: смена выходит за пределы работы кафе!\n'
                         f'Невозможно сохранить изменения.\n\n'
-                        f'Кафе работает с {cafe.open_time.strftime("%H:%M")}'
-                        f'до {cafe.close_time.strftime("%H:%M")}',
-                        reply_markup=keyboard,
+                        f'Кафе работает с {open_time.strftime("%H:%M")}'
+                        f'до {close_time.strftime("%H:%M")}',
+                        reply_markup=_BACK_TO_CREATING_KEYBOARD,
                     )
                     return EDIT_SHIFT_FIELDS
 
                 # Проверка пересечений с существующими сменами
-                existing_shifts = await shift_crud.get_multi(
-                    cafe_id=shift_data['cafe_id'], session=session
+                conflict = await shift_crud.find_overlapping(
+                    shift_data['cafe_id'], start_dt, end_dt, session
                 )
-
-                for shift in existing_shifts:
-                    # Приводим все даты к одинаковому формату
-                    # (без временной зоны)
-                    existing_start = shift.start_time.replace(tzinfo=None)
-                    existing_end = shift.end_time.replace(tzinfo=None)
-                    if start_dt < existing_end and end_dt > existing_start:
-                        keyboard = InlineKeyboardMarkup([
-                            [
-                                InlineKeyboardButton(
-                                    '← Вернуться к созданию смены',
-                                    callback_data='continue_creating_shifts',
-                                )
-                            ]
-                        ])
-                        await query.edit_message_text(
-                            f'❌ Ошибка: пересечение с существующей сменой!\n'
-                            f'Конфликтующая смена: '
-                            f'{shift.start_time.strftime("%d.%m.%Y %H:%M")}-'
-                            f'{shift.end_time.strftime("%H:%M")}',
-                            reply_markup=keyboard,
-                        )
-                        return EDIT_SHIFT_FIELDS
+                if conflict:
+                    await query.edit_message_text(
+                        f'❌ Ошибка: пересечение с существующей сменой!\n'
+                        f'Конфликтующая смена: '
+                        f'{conflict.start_time.strftime("%d.%m.%Y %H:%M")}-'
+                        f'{conflict.end_time.strftime("%H:%M")}',
+                        reply_markup=_BACK_TO_CREATING_KEYBOARD,
+                    )
+                    return EDIT_SHIFT_FIELDS
 
                 shift_create = ShiftCreate(
                     start_time=start_dt,
@@ -422,20 +473,19 @@ class CreateShiftHandler:
                     cafe_id=shift_data['cafe_id'],
                 )
                 # async with async_session_maker() as session:
-                shift = await shift_crud.create(
+                await shift_crud.create(
                     obj_in=shift_create, session=session
                 )
 
-                # Получаем обновленный список смен
+                # Список смен загружаем только после успешного сохранения
                 shifts = await shift_crud.get_multi(
                     session=session, cafe_id=shift_data['cafe_id']
                 )
                 # Формируем сообщение с подтверждением и списком смен
                 shifts_list = '\n'.join(
-                    f'• {s.start_time.strftime("%d.%m.%Y %H:%M")}-'
-                    f'{s.end_time.strftime("%H:%M")} '
+                    f'• {s.start_time:%d.%m.%Y %H:%M}-{s.end_time:%H:%M} '
                     f'({s.barista_count} бариста)'
-                    for s in sorted(shifts, key=lambda x: x.start_time)
+                    for s in shifts
                 )
 
                 message = (
@@ -444,18 +494,9 @@ class CreateShiftHandler:
                     f'Создать еще одну смену?'
                 )
 
-                # Кнопки для продолжения
-                keyboard = InlineKeyboardMarkup([
-                    [
-                        InlineKeyboardButton(
-                            'Да', callback_data='continue_creating_shifts'
-                        ),
-                        InlineKeyboardButton(
-                            'Нет', callback_data='finish_creating_shifts'
-                        ),
-                    ]
-                ])
-                await query.edit_message_text(message, reply_markup=keyboard)
+                await query.edit_message_text(
+                    message, reply_markup=_CONTINUE_KEYBOARD
+                )
                 context.user_data['current_cafe_id'] = shift_data['cafe_id']
             return CONFIRM_SHIFT_DATA
         except Exception as e:
@@ -476,8 +517,8 @@ class CreateShiftHandler:
             'Создание слота отменено', reply_markup=None
         )
 
-        if 'new_shift' in context.user_data:
-            del context.user_data['new_shift']
+        context.user_data.pop('new_shift', None)
+        context.user_data.pop('new_shift_cafe', None)
 
         return await show_start_menu(update, context)
 
@@ -495,20 +536,10 @@ class CreateShiftHandler:
             cafe_id = context.user_data.get('current_cafe_id')
             if cafe_id:
                 # Очищаем предыдущие данные, кроме cafe_id
-                context.user_data['new_shift'] = {
-                    'date': datetime.now().date(),
-                    'start_time': None,
-                    'end_time': None,
-                    'barista_count': None,
-                    'cafe_id': cafe_id,
-                }
-
-                # Удаляем сообщение с кнопками
-                await context.bot.delete_message(
-                    chat_id=update.effective_chat.id,
-                    message_id=query.message.message_id,
+                context.user_data['new_shift'] = dict(
+                    _SHIFT_TEMPLATE, date=date.today(), cafe_id=cafe_id
                 )
-
+                # Сообщение с кнопками заменяется формой новой смены
                 return await self.edit_shift_fields(update, context)
 
         # Если выбрано "Нет" или cafe_id не найден
@@ -578,6 +609,10 @@ class CreateShiftHandler:
                 ],
             },
             fallbacks=[CommandHandler('cancel', cancel)],
+            # per_message=True невозможен: вход по команде и ввод полей
+            # текстом; состояние хранится по паре (чат, пользователь)
+            per_chat=True,
+            per_user=True,
             per_message=False,
         )
 
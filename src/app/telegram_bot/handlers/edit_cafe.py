@@ -2,6 +2,7 @@
 
 import logging
 from datetime import time
+from types import MappingProxyType
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import (
@@ -19,12 +20,46 @@ from app.crud.cafe_crud import cafe_crud
 from app.crud.user_crud import crud_user
 from app.schemas.cafe_schema import CafeUpdate
 from app.telegram_bot.commands import cancel, show_start_menu
+from app.telegram_bot.utils import delete_messages
 
 logger = logging.getLogger(__name__)
 
 # Состояния для редактирования кафе
 LIST_CAFES, SELECT_CAFE, EDIT_CAFE_FIELDS, SELECT_MANAGER = range(4)
 
+_FIELD_PROMPTS = MappingProxyType({
+    "name": "Введите новое название кафе:",
+    "city": "Введите новый город:",
+    "address": "Введите новый адрес кафе:",
+    "open_time": "Введите новое время открытия (ЧЧ:ММ):",
+    "close_time": "Введите новое время закрытия (ЧЧ:ММ):",
+    "phone": "Введите новый телефон кафе:",
+    "description": "Введите новое описание кафе:",
+})
+_SAVE_CANCEL_ROW = (
+    InlineKeyboardButton(
+        "✅ Сохранить изменения", callback_data="save_cafe_changes"
+    ),
+    InlineKeyboardButton("❌ Отменить", callback_data="cancel_edit_cafe"),
+)
+
+# Ключи user_data, которые живут только в рамках диалога
+_TRANSIENT_KEYS = (
+    "editing_cafe_id",
+    "current_cafe",
+    "current_manager_name",
+    "current_cafe_formatted",
+    "editing_field",
+)
+
+
+async def _get_managers() -> list[tuple[int, str, int]]:
+    """Возвращает менеджеров из кэша CRUD, сбрасываемого при записи."""
+    async with async_session_maker() as session:
+        return await crud_user.get_multi_by_role_cached(
+            "manager", session
+        )
+
 
 class EditCafeHandler:
     """Обработчик редактирования кафе с интерактивным интерфейсом."""
@@ -53,46 +88,46 @@ class EditCafeHandler:
             await query.answer()
 
         async with async_session_maker() as session:
-            cafes = await cafe_crud.get_multi(session)
+            cafes = await cafe_crud.get_summaries_cached(session)
 
-            if not cafes:
-                await context.bot.send_message(
-                    chat_id=update.effective_chat.id,
-                    text="Нет доступных кафе для редактирования."
-                )
-                return await show_start_menu(update, context)
-
-            buttons = []
-            for cafe in cafes:
-                buttons.append([
-                    InlineKeyboardButton(
-                        f"{cafe.name} ({cafe.city}, {cafe.address})",
-                        callback_data=f"select_cafe_{cafe.id}"
-                    )
-                ])
+        if not cafes:
+            await context.bot.send_message(
+                chat_id=update.effective_chat.id,
+                text="Нет доступных кафе для редактирования."
+            )
+            return await show_start_menu(update, context)
 
+        buttons = []
+        for cafe_id, name, city, address in cafes:
             buttons.append([
                 InlineKeyboardButton(
-                    "❌ Отменить", callback_data="cancel_edit_cafe")
+                    f"{name} ({city}, {address})",
+                    callback_data=f"select_cafe_{cafe_id}"
+                )
             ])
 
-            keyboard = InlineKeyboardMarkup(buttons)
+        buttons.append([
+            InlineKeyboardButton(
+                "❌ Отменить", callback_data="cancel_edit_cafe")
+        ])
+
+        keyboard = InlineKeyboardMarkup(buttons)
 
-            try:
-                if query:
-                    await query.edit_message_text(
-                        "Выберите кафе для редактирования:",
-                        reply_markup=keyboard
-                    )
-                else:
-                    await context.bot.send_message(
-                        chat_id=update.effective_chat.id,
-                        text="Выберите кафе для редактирования:",
-                        reply_markup=keyboard
-                    )
-            except Exception as e:
-                logger.error('Error in list_cafes_start: %s', e)
-                return await show_start_menu(update, context)
+        try:
+            if query:
+                await query.edit_message_text(
+                    "Выберите кафе для редактирования:",
+                    reply_markup=keyboard
+                )
+            else:
+                await context.bot.send_message(
+                    chat_id=update.effective_chat.id,
+                    text="Выберите кафе для редактирования:",
+                    reply_markup=keyboard
+                )
+        except Exception as e:
+            logger.error('Error in list_cafes_start: %s', e)
+            return await show_start_menu(update, context)
 
         return LIST_CAFES
 
@@ -114,7 +149,7 @@ class EditCafeHandler:
         context.user_data["editing_cafe_id"] = cafe_id
 
         async with async_session_maker() as session:
-            cafe = await cafe_crud.get(cafe_id, session)
+            cafe = await cafe_crud.get_with_manager(cafe_id, session)
             if not cafe:
                 await query.edit_message_text(
                     "Кафе не найдено.",
@@ -133,9 +168,44 @@ class EditCafeHandler:
                 'manager_id': cafe.manager_id,
                 'is_active': cafe.is_active
             }
+            # Имя менеджера хранится отдельно от полей кафе, чтобы
+            # отрисовка меню не обращалась к БД
+            context.user_data["current_manager_name"] = (
+                cafe.manager.name if cafe.manager else None
+            )
+        self._format_fields(context)
 
         return await self.edit_cafe_fields(update, context)
 
+    def _format_fields(
+        self, context: ContextTypes.DEFAULT_TYPE
+    ) -> list[tuple[str, str]]:
+        """Формирует подписи кнопок полей и сохраняет их в user_data.
+
+        Вызывается при каждом изменении current_cafe, поэтому отрисовка
+        меню не повторяет форматирование значений.
+        """
+        cafe_data = context.user_data["current_cafe"]
+        rows = []
+        for field, label in self.editing_fields.items():
+            field_value = cafe_data.get(field)
+
+            if field_value is None:
+                field_value = "Не указано"
+            elif isinstance(field_value, bool):
+                field_value = "Да" if field_value else "Нет"
+            elif field == "manager_id" and field_value:
+                field_value = (
+                    context.user_data.get("current_manager_name")
+                    or "Неизвестный"
+                )
+            elif isinstance(field_value, time):
+                field_value = field_value.strftime("%H:%M")
+
+            rows.append((field, f"{label}: {field_value}"))
+        context.user_data["current_cafe_formatted"] = rows
+        return rows
+
     async def edit_cafe_fields(
         self, update: Update, context: ContextTypes.DEFAULT_TYPE
     ) -> int:
@@ -152,36 +222,16 @@ class EditCafeHandler:
             )
             return await show_start_menu(update, context)
 
-        cafe_data = context.user_data["current_cafe"]
-
-        buttons = []
-        for field, label in self.editing_fields.items():
-            field_value = cafe_data.get(field)
-
-            if field_value is None:
-                field_value = "Не указано"
-            elif isinstance(field_value, bool):
-                field_value = "Да" if field_value else "Нет"
-            elif field == "manager_id" and field_value:
-                async with async_session_maker() as session:
-                    manager = await crud_user.get(field_value, session)
-                    field_value = manager.name if manager else "Неизвестный"
-            elif isinstance(field_value, time):
-                field_value = field_value.strftime("%H:%M")
+        rows = context.user_data.get("current_cafe_formatted")
+        if rows is None:
+            rows = self._format_fields(context)
 
-            buttons.append([
-                InlineKeyboardButton(
-                    f"{label}: {field_value}",
-                    callback_data=f"edit_cafe_{field}"
-                )
-            ])
+        buttons = [
+            [InlineKeyboardButton(text, callback_data=f"edit_cafe_{field}")]
+            for field, text in rows
+        ]
 
-        buttons.append([
-            InlineKeyboardButton("✅ Сохранить изменения",
-                                 callback_data="save_cafe_changes"),
-            InlineKeyboardButton(
-                "❌ Отменить", callback_data="cancel_edit_cafe")
-        ])
+        buttons.append(_SAVE_CANCEL_ROW)
 
         keyboard = InlineKeyboardMarkup(buttons)
         message = "Редактирование кафе. Выберите поле для изменения:\n"
@@ -218,19 +268,9 @@ class EditCafeHandler:
         if field == "is_active":
             return await self.toggle_cafe_active(update, context)
 
-        field_prompts = {
-            "name": "Введите новое название кафе:",
-            "city": "Введите новый город:",
-            "address": "Введите новый адрес кафе:",
-            "open_time": "Введите новое время открытия (ЧЧ:ММ):",
-            "close_time": "Введите новое время закрытия (ЧЧ:ММ):",
-            "phone": "Введите новый телефон кафе:",
-            "description": "Введите новое описание кафе:",
-        }
-
         # Отправляем сообщение с запросом ввода
         message = await query.edit_message_text(
-            field_prompts[field],
+            _FIELD_PROMPTS[field],
             reply_markup=None
         )
 
@@ -250,6 +290,7 @@ class EditCafeHandler:
 
         current_value = context.user_data["current_cafe"]["is_active"]
         context.user_data["current_cafe"]["is_active"] = not current_value
+        self._format_fields(context)
 
         return await self.edit_cafe_fields(update, context)
 
@@ -260,31 +301,28 @@ class EditCafeHandler:
         query = update.callback_query
         await query.answer()
 
-        async with async_session_maker() as session:
-            managers = await crud_user.get_multi_by_role("manager", session)
-
-            buttons = []
-            for manager in managers:
-                buttons.append([
-                    InlineKeyboardButton(
-                        f"{manager.name} (ID: {manager.telegram_id})",
-                        callback_data=f"select_manager_{manager.id}",
-                    )
-                ])
-
-            buttons.append([
-                InlineKeyboardButton("⏪ Назад", callback_data="back_to_edit")
-            ])
+        buttons = [
+            [
+                InlineKeyboardButton(
+                    f"{name} (ID: {telegram_id})",
+                    callback_data=f"select_manager_{manager_id}",
+                )
+            ]
+            for manager_id, name, telegram_id in await _get_managers()
+        ]
+        buttons.append([
+            InlineKeyboardButton("⏪ Назад", callback_data="back_to_edit")
+        ])
 
-            keyboard = InlineKeyboardMarkup(buttons)
-            message = await query.edit_message_text(
-                "Выберите менеджера для кафе:", reply_markup=keyboard
-            )
+        keyboard = InlineKeyboardMarkup(buttons)
+        message = await query.edit_message_text(
+            "Выберите менеджера для кафе:", reply_markup=keyboard
+        )
 
-            # Сохраняем ID сообщения бота для последующего удаления
-            if 'last_bot_messages' not in context.user_data:
-                context.user_data['last_bot_messages'] = []
-            context.user_data['last_bot_messages'].append(message.message_id)
+        # Сохраняем ID сообщения бота для последующего удаления
+        if 'last_bot_messages' not in context.user_data:
+            context.user_data['last_bot_messages'] = []
+        context.user_data['last_bot_messages'].append(message.message_id)
 
         return SELECT_MANAGER
 
@@ -299,7 +337,10 @@ class EditCafeHandler:
             return await self.edit_cafe_fields(update, context)
 
         manager_id = int(query.data.replace("select_manager_", ""))
+        names = {mid: name for mid, name, _ in await _get_managers()}
         context.user_data["current_cafe"]["manager_id"] = manager_id
+        context.user_data["current_manager_name"] = names.get(manager_id)
+        self._format_fields(context)
 
         return await self.edit_cafe_fields(update, context)
 
@@ -343,25 +384,15 @@ class EditCafeHandler:
             await update.message.reply_text("Некорректный формат данных.")
             return EDIT_CAFE_FIELDS
 
-        # Удаляем предыдущие сообщения бота (запросы на ввод)
-        if 'last_bot_messages' in context.user_data:
-            for msg_id in context.user_data['last_bot_messages']:
-                try:
-                    await context.bot.delete_message(
-                        chat_id=update.effective_chat.id,
-                        message_id=msg_id,
-                    )
-                except Exception as e:
-                    logger.error(f"Error deleting message {msg_id}: {e}")
-            del context.user_data['last_bot_messages']
-
-        # Удаляем сообщение пользователя с вводом данных
-        await context.bot.delete_message(
-            chat_id=update.effective_chat.id,
-            message_id=update.message.message_id,
+        # Удаляем запросы бота и сообщение пользователя с вводом данных
+        msg_ids = context.user_data.pop('last_bot_messages', [])
+        msg_ids.append(update.message.message_id)
+        await delete_messages(
+            context.bot, update.effective_chat.id, msg_ids
         )
 
         context.user_data["current_cafe"][field] = value
+        self._format_fields(context)
 
         return await self.edit_cafe_fields(update, context)
 
@@ -382,15 +413,30 @@ class EditCafeHandler:
 
         cafe_data = context.user_data["current_cafe"]
 
-        # Удаляем поля, которые не изменились
+        updated_cafe = None
         async with async_session_maker() as session:
+            # Удаляем поля, которые не изменились
             original_cafe = await cafe_crud.get(cafe_id, session)
-            update_data = {}
+            original = {
+                field: getattr(original_cafe, field)
+                for field in self.editing_fields
+            }
+            update_data = {
+                field: value
+                for field, value in cafe_data.items()
+                if original[field] != value
+            }
 
-            for field, value in cafe_data.items():
-                original_value = getattr(original_cafe, field)
-                if original_value != value:
-                    update_data[field] = value
+            # Обновляем в той же сессии, пока original_cafe к ней привязан
+            if update_data:
+                try:
+                    updated_cafe = await cafe_crud.update(
+                        db_obj=original_cafe,
+                        obj_in=CafeUpdate(**update_data),
+                        session=session,
+                    )
+                except Exception as e:
+                    logger.error('Error updating cafe: %s', e)
 
         if not update_data:
             await query.edit_message_text(
@@ -399,31 +445,20 @@ class EditCafeHandler:
             )
             return await show_start_menu(update, context)
 
-        try:
-            cafe_update = CafeUpdate(**update_data)
-            async with async_session_maker() as session:
-                updated_cafe = await cafe_crud.update(
-                    db_obj=original_cafe, obj_in=cafe_update, session=session
-                )
-
+        if updated_cafe is None:
             await query.edit_message_text(
-                f"Кафе '{updated_cafe.name}' успешно обновлено!",
+                "Ошибка при обновлении кафе",
                 reply_markup=None
             )
-        except Exception as e:
-            logger.error('Error updating cafe: %s', e)
+        else:
             await query.edit_message_text(
-                "Ошибка при обновлении кафе",
+                f"Кафе '{updated_cafe.name}' успешно обновлено!",
                 reply_markup=None
             )
 
         # Очищаем данные после сохранения
-        if "editing_cafe_id" in context.user_data:
-            del context.user_data["editing_cafe_id"]
-        if "current_cafe" in context.user_data:
-            del context.user_data["current_cafe"]
-        if "editing_field" in context.user_data:
-            del context.user_data["editing_field"]
+        for key in _TRANSIENT_KEYS:
+            context.user_data.pop(key, None)
 
         return await show_start_menu(update, context)
 
@@ -440,12 +475,8 @@ class EditCafeHandler:
         )
 
         # Очищаем данные после отмены
-        if "editing_cafe_id" in context.user_data:
-            del context.user_data["editing_cafe_id"]
-        if "current_cafe" in context.user_data:
-            del context.user_data["current_cafe"]
-        if "editing_field" in context.user_data:
-            del context.user_data["editing_field"]
+        for key in _TRANSIENT_KEYS:
+            context.user_data.pop(key, None)
 
         return await show_start_menu(update, context)
 
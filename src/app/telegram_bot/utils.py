@@ -0,0 +1,26 @@
+"""Вспомогательные функции обработчиков бота."""
+
+import asyncio
+import logging
+from collections.abc import Iterable
+
+from telegram import Bot
+
+logger = logging.getLogger(__name__)
+
+
+async def delete_messages(
+    bot: Bot, chat_id: int, msg_ids: Iterable[int]
+) -> None:
+    """Одновременно удаляет сообщения чата, логируя ошибки."""
+    msg_ids = list(msg_ids)
+    results = await asyncio.gather(
+        *(
+            bot.delete_message(chat_id=chat_id, message_id=msg_id)
+            for msg_id in msg_ids
+        ),
+        return_exceptions=True,
+    )
+    for msg_id, result in zip(msg_ids, results):
+        if isinstance(result, Exception):
+            logger.error('Error deleting message %s: %s', msg_id, result)